@@ -0,0 +1,218 @@
+# incremental_train.py - Daily model update from newly labelled runs
+#
+# Usage:
+#   python incremental_train.py --new-runs "../Labelled Data/*_1042.csv" \
+#       --history exported_data.csv --model anomaly_detector.pkl
+#
+# Instead of retraining from scratch (model.py, up to 1000 rounds on the full
+# CSV), this loads the current Booster and either adds a few boosting rounds
+# on the new runs only ("continue") or re-fits the leaf values of the existing
+# trees to them ("refresh"). The candidate is scored on the held-out runs
+# recorded by model.py and only replaces the live model if it stays within
+# --tolerance of both the current model and the last full retrain.
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, f1_score
+
+# Shared feature schema (column order, dtypes, ranges) from the backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from feature_schema import FeatureSchema
+
+# Same as model.py; used when the Booster predates embedded train params
+DEFAULT_PARAMS = {
+    'objective': 'multi:softprob',
+    'num_class': 4,
+    'eval_metric': ['mlogloss', 'merror'],
+    'eta': 0.05,
+    'max_depth': 8,
+    'min_child_weight': 5,
+    'gamma': 1.0,
+    'subsample': 0.7,
+    'colsample_bytree': 0.7,
+    'lambda': 2,
+    'alpha': 1,
+    'seed': 42
+}
+
+
+def normalize_run_id(value):
+    """Compare run ids as text, ignoring leading zeros and a float '.0' suffix"""
+    text = str(value).strip()
+    if text.endswith('.0'):
+        text = text[:-2]
+    return str(int(text)) if text.isdigit() else text
+
+
+def run_id_from_filename(path):
+    """Run id as Labelling/Label.py writes it: the first number in the file name"""
+    match = re.search(r"(\d+)", os.path.basename(path))
+    if match is None:
+        raise SystemExit(f"{path} has no 'Run id' column and no run number in its name "
+                         f"(expected {{type}}_{{run_id}}.csv from Label.py)")
+    return match.group(1)
+
+
+def load_runs(paths, schema):
+    """Load labelled run files; a file without a 'Run id' column is one run, named as in Label.py"""
+    frames = []
+    for path in paths:
+        df = pd.read_csv(path)
+        if 'Run id' not in df.columns:
+            df['Run id'] = run_id_from_filename(path)
+        df['Run id'] = df['Run id'].map(normalize_run_id)
+        frames.append(df[schema.columns + ['Anomaly', 'Run id']])
+    return pd.concat(frames, ignore_index=True)
+
+
+def holdout_cache_path(cache_dir, history_path, run_ids, schema):
+    """Cache file keyed by the history file version, held-out runs and schema"""
+    stat = os.stat(history_path)
+    key = hashlib.sha1(json.dumps([
+        os.path.abspath(history_path), stat.st_size, stat.st_mtime, sorted(run_ids), schema.fingerprint
+    ]).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"holdout-{key}.buffer")
+
+
+def load_holdout(history_path, run_ids, schema, cache_dir, chunk_size=200000):
+    """
+    DMatrix of the held-out historical runs. Built once by streaming the
+    history CSV in chunks (only held-out rows are kept) and then cached in
+    XGBoost's binary format, so daily updates never re-parse the full CSV.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = holdout_cache_path(cache_dir, history_path, run_ids, schema)
+    if os.path.exists(cache_path):
+        print(f"Using cached held-out DMatrix: {cache_path}")
+        dholdout = xgb.DMatrix(cache_path)
+        dholdout.feature_names = schema.columns
+        return dholdout
+
+    print(f"Building held-out DMatrix from {history_path} ...")
+    wanted = set(run_ids)
+    parts = []
+    for chunk in pd.read_csv(history_path, chunksize=chunk_size,
+                             usecols=schema.columns + ['Anomaly', 'Run id']):
+        chunk = chunk[chunk['Run id'].map(normalize_run_id).isin(wanted)]
+        if len(chunk):
+            parts.append(chunk)
+    if not parts:
+        raise SystemExit("None of the held-out runs were found in the history file")
+    holdout = pd.concat(parts, ignore_index=True)
+
+    dholdout = xgb.DMatrix(holdout[schema.columns], label=holdout['Anomaly'])
+    dholdout.save_binary(cache_path)
+    print(f"Cached {len(holdout):,} held-out rows to {cache_path}")
+    return dholdout
+
+
+def evaluate(booster, dmatrix):
+    y_true = dmatrix.get_label().astype(int)
+    y_pred = np.argmax(booster.predict(dmatrix), axis=1)
+    return {
+        "macro_f1": float(f1_score(y_true, y_pred, average='macro')),
+        "accuracy": float(accuracy_score(y_true, y_pred)),
+    }
+
+
+def train_candidate(booster, params, new_runs, schema, mode, rounds):
+    X, y = new_runs[schema.columns], new_runs['Anomaly']
+
+    if mode == 'refresh':
+        # Keep the tree structure, re-fit leaf values (and stats) to the new runs
+        refresh_params = {**params, 'process_type': 'update', 'updater': 'refresh', 'refresh_leaf': True}
+        dnew = xgb.DMatrix(X, label=y)
+        return xgb.train(refresh_params, dnew, num_boost_round=booster.num_boosted_rounds(),
+                         xgb_model=booster, verbose_eval=False)
+
+    # Continue boosting: a few extra trees fit on the new runs only. The
+    # quantized QuantileDMatrix keeps memory low for large daily batches.
+    dnew = xgb.QuantileDMatrix(X, label=y)
+    # No early stopping: the held-out runs are reserved for the promotion gate
+    return xgb.train(params, dnew, num_boost_round=rounds, xgb_model=booster,
+                     evals=[(dnew, 'new')], verbose_eval=10)
+
+
+def promote(candidate, model_path, schema, params):
+    """Atomically replace the live model, keeping the previous one as a backup"""
+    schema.attach(candidate)
+    candidate.set_attr(train_params=json.dumps(params))
+    tmp_path = model_path + '.tmp'
+    joblib.dump(candidate, tmp_path)
+    if os.path.exists(model_path):
+        shutil.copy2(model_path, os.path.splitext(model_path)[0] + '.prev.pkl')
+    os.replace(tmp_path, model_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally update the anomaly model from new runs")
+    parser.add_argument('--new-runs', nargs='+', required=True, help="CSV files or globs of new labelled runs")
+    parser.add_argument('--history', required=True, help="Historical training CSV (exported_data.csv)")
+    parser.add_argument('--model', default='anomaly_detector.pkl', help="Current model to update in place")
+    parser.add_argument('--holdout', default='holdout_runs.json', help="Held-out runs written by model.py")
+    parser.add_argument('--cache-dir', default='cache', help="Where the held-out DMatrix is cached")
+    parser.add_argument('--mode', choices=['continue', 'refresh'], default='continue')
+    parser.add_argument('--rounds', type=int, default=50, help="Extra boosting rounds in continue mode")
+    parser.add_argument('--tolerance', type=float, default=0.005,
+                        help="Max macro-F1 drop allowed vs the current model and the last full retrain")
+    parser.add_argument('--dry-run', action='store_true', help="Evaluate but never replace the model")
+    args = parser.parse_args(argv)
+
+    booster = joblib.load(args.model)
+    schema = FeatureSchema.from_booster(booster)
+    raw_params = booster.attr('train_params')
+    params = json.loads(raw_params) if raw_params else DEFAULT_PARAMS
+
+    with open(args.holdout) as f:
+        holdout_info = json.load(f)
+    holdout_runs = [normalize_run_id(r) for r in holdout_info['run_ids']]
+
+    paths = sorted({p for pattern in args.new_runs for p in glob.glob(pattern)})
+    if not paths:
+        print("No new run files found", file=sys.stderr)
+        return 1
+    new_runs = load_runs(paths, schema)
+    leaked = set(new_runs['Run id'].astype(str)) & set(holdout_runs)
+    if leaked:
+        print(f"Refusing to train on held-out runs: {sorted(leaked)}", file=sys.stderr)
+        return 1
+    print(f"Loaded {len(new_runs):,} rows from {new_runs['Run id'].nunique()} new runs")
+
+    dholdout = load_holdout(args.history, holdout_runs, schema, args.cache_dir)
+    current = evaluate(booster, dholdout)
+    candidate = train_candidate(booster, params, new_runs, schema, args.mode, args.rounds)
+    updated = evaluate(candidate, dholdout)
+    reference = holdout_info.get('macro_f1')
+
+    print(f"\nHeld-out macro F1 - current: {current['macro_f1']:.4f} | candidate: {updated['macro_f1']:.4f}"
+          + (f" | last full retrain: {reference:.4f}" if reference is not None else ""))
+
+    floor = current['macro_f1'] - args.tolerance
+    if reference is not None:
+        floor = max(floor, reference - args.tolerance)
+    if updated['macro_f1'] < floor:
+        print(f"Candidate rejected: macro F1 {updated['macro_f1']:.4f} is below the gate {floor:.4f}")
+        return 2
+
+    if args.dry_run:
+        print("Candidate passes the gate (dry run, model not replaced)")
+        return 0
+
+    promote(candidate, args.model, schema, params)
+    print(f"Candidate promoted to {args.model} ({candidate.num_boosted_rounds()} boosting rounds)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
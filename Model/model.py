@@ -6,6 +6,14 @@ from sklearn.metrics import classification_report, confusion_matrix, accuracy_sc
 import xgboost as xgb
 import matplotlib.pyplot as plt
 import seaborn as sns
+import os
+import sys
+
+# Shared feature schema (column order, dtypes, ranges) from the backend
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from feature_schema import DEFAULT_SCHEMA, MODULES, NON_FEATURE_COLUMNS, SchemaMismatchError, module_of
+from drift_monitor import build_reference_profile
+from module_ensemble import ModuleEnsemble
 
 # Load dataset (already balanced by you)
 df = pd.read_csv(r"G:\Projects\honeywell\Anomalyze\DataProcessing\exported_data.csv")
@@ -13,9 +21,14 @@ df = pd.read_csv(r"G:\Projects\honeywell\Anomalyze\DataProcessing\exported_data.
 # --- Shuffle dataset to remove sequential bias ---
 df = df.sample(frac=1, random_state=42).reset_index(drop=True)
 
-# Drop non-feature columns
-exclude_cols = ['number', 'Timestamp', 'Anomaly', 'Parameter for Anomaly', 'Actual value', 'Run id']
-features = df.drop(columns=exclude_cols)
+# Select features explicitly in schema order (never rely on CSV column order)
+exclude_cols = NON_FEATURE_COLUMNS
+unexpected = set(df.columns) - set(exclude_cols) - set(DEFAULT_SCHEMA.columns)
+missing = set(DEFAULT_SCHEMA.columns) - set(df.columns)
+if unexpected or missing:
+    raise SchemaMismatchError(f"Dataset does not match the feature schema: "
+                              f"unexpected={sorted(unexpected)}, missing={sorted(missing)}")
+features = df[DEFAULT_SCHEMA.columns]
 target = df['Anomaly']
 
 # Step 2: Train-test split (by Run id to avoid leakage)
@@ -94,5 +107,106 @@ plt.show()
 
 import joblib
 
+# Embed the feature schema (order, dtypes, ranges seen in training) into the model
+schema = DEFAULT_SCHEMA.fit_ranges(X_train)
+schema.attach(bst)
+schema.check_booster(bst)
+
+# The Booster is saved and served with all rounds (no best_iteration
+# truncation), so everything recorded for later comparison is scored that way
+served_prob = bst.predict(dtest)
+served_pred = np.argmax(served_prob, axis=1)
+
+# Keep what incremental_train.py needs to continue from this model: the training
+# params, and the held-out runs with the full-retrain score on them, computed
+# like incremental_train.evaluate() scores the current model and the candidate
+import json
+bst.set_attr(train_params=json.dumps(params))
+with open("holdout_runs.json", "w") as f:
+    json.dump({
+        "run_ids": [str(r) for r in test_runs],
+        "macro_f1": float(f1_score(y_test, served_pred, average='macro')),
+        "accuracy": float(accuracy_score(y_test, served_pred))
+    }, f, indent=2)
+
+# Reference profile for drift monitoring in the backend (copy next to the model).
+# Live traffic is mostly healthy while the training set is class-balanced, so
+# the profile uses Normal rows only: training rows for the input bins, held-out
+# rows for the predictions, scored as served.
+normal_test = (y_test == 0).to_numpy()
+with open("drift_reference.json", "w") as f:
+    json.dump(build_reference_profile(X_train[y_train == 0], schema, served_prob[normal_test]), f)
+
 # Save the trained XGBoost model
-joblib.dump(bst, "anomaly_detector.pkl")
\ No newline at end of file
+joblib.dump(bst, "anomaly_detector.pkl")
+
+
+# Step 9: One small model per module, on that module's columns only.
+# Each module learns its own label: the run's anomaly class when the faulty
+# parameter ('Parameter for Anomaly') belongs to that module, Normal otherwise.
+# Retraining one module leaves the other boosters untouched.
+fault_module = df['Parameter for Anomaly'].fillna('No Anomaly').astype(str).map(module_of)
+unattributed = (target != 0) & ~fault_module.isin(MODULES)
+if unattributed.any():
+    print(f"Dropping {int(unattributed.sum()):,} anomalous rows whose parameter names no module "
+          f"from per-module training: {sorted(df.loc[unattributed, 'Parameter for Anomaly'].astype(str).unique())[:5]}")
+module_train = train_idx & ~unattributed
+module_test = test_idx & ~unattributed
+
+module_params = {**params, 'max_depth': 6, 'colsample_bytree': 1.0}
+module_boosters = {}
+for module in schema.modules:
+    columns = schema.modules[module]
+    if not columns:
+        continue
+    module_target = target.where(fault_module == module, 0)
+    dtrain_module = xgb.DMatrix(features.loc[module_train, columns], label=module_target[module_train])
+    dtest_module = xgb.DMatrix(features.loc[module_test, columns], label=module_target[module_test])
+    module_bst = xgb.train(
+        module_params,
+        dtrain_module,
+        num_boost_round=300,
+        evals=[(dtest_module, 'eval')],
+        early_stopping_rounds=30,
+        verbose_eval=False
+    )
+    # Keep only the rounds up to the best iteration so serving needs no iteration_range
+    module_boosters[module] = module_bst[:module_bst.best_iteration + 1]
+    module_pred = np.argmax(module_boosters[module].predict(dtest_module), axis=1)
+    print(f"{module:<15} {len(columns):>2} features, {module_boosters[module].num_boosted_rounds():>3} rounds, "
+          f"macro F1 on its own label {f1_score(module_target[module_test], module_pred, average='macro'):.4f}")
+
+# Compare with the monolithic Booster exactly as it is served (all rounds).
+# The backend only uses the ensemble with SCORING_MODE=modules; check this
+# report and the latency benchmark (backend/module_ensemble.py) first.
+module_ensemble = ModuleEnsemble(module_boosters, schema)
+X_module_test = schema.to_matrix(features[module_test])
+y_module_test = target[module_test].to_numpy()
+merged_prob, merged_pred, _ = module_ensemble.score(X_module_test)
+served_module_pred = np.argmax(bst.predict(xgb.DMatrix(features[module_test])), axis=1)
+normal_rows = y_module_test == 0
+module_report = {
+    "ensemble": {
+        "macro_f1": float(f1_score(y_module_test, merged_pred, average='macro')),
+        "false_positive_rate": float(np.mean(merged_pred[normal_rows] != 0)),
+    },
+    "monolithic": {
+        "macro_f1": float(f1_score(y_module_test, served_module_pred, average='macro')),
+        "false_positive_rate": float(np.mean(served_module_pred[normal_rows] != 0)),
+    },
+    "agreement": float(np.mean(merged_pred == served_module_pred)),
+}
+print(f"\nPer-module ensemble: macro F1 {module_report['ensemble']['macro_f1']:.4f}, "
+      f"false positives {module_report['ensemble']['false_positive_rate']:.2%}")
+print(f"Monolithic model:    macro F1 {module_report['monolithic']['macro_f1']:.4f}, "
+      f"false positives {module_report['monolithic']['false_positive_rate']:.2%}")
+print(f"Verdict agreement:   {module_report['agreement']:.2%}")
+with open("module_report.json", "w") as f:
+    json.dump(module_report, f, indent=2)
+
+# Drift reference for the ensemble's own class mix and confidence
+with open("drift_reference_modules.json", "w") as f:
+    json.dump(build_reference_profile(X_train[y_train == 0], schema, merged_prob[normal_rows]), f)
+
+module_ensemble.save("module_models.pkl")
+module_ensemble.close()
@@ -1,6 +1,6 @@
 # backend/app.py - Flask Backend for Ice Cream Anomaly Detection System
 
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, request, jsonify, render_template_string, Response, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
@@ -8,6 +8,19 @@ import joblib
 import logging
 from datetime import datetime
 import os
+import threading
+import time
+from collections import OrderedDict
+
+from data_generator import IceCreamDataGenerator
+from stream_hub import PredictionStreamHub
+from event_store import PredictionStore
+from episode_tracker import EpisodeTracker
+from feature_schema import DEFAULT_SCHEMA, FeatureSchema, SchemaMismatchError
+from validation import OUTSIDE_TRAINING, validate_batch
+from attribution import anomaly_mapping, identify_anomaly_parameters
+from drift_monitor import DriftMonitor
+from module_ensemble import ModuleEnsemble
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,93 +31,232 @@ CORS(app)
 
 # Global variables
 model = None
-feature_columns = None
-anomaly_mapping = {0: "Normal", 1: "Freeze", 2: "Step", 3: "Ramp"}
-
-# Feature columns (54 total as per your model training)
-FEATURE_COLUMNS = [
-    'Mixer/OpenDumpValve', 'Mixer/Level', 'Mixer/Temperature', 'Mixer/OpenOutlet',
-    'Mixer/Fill1On', 'Mixer/Fill2On', 'Mixer/Fill3On', 'Mixer/Fill4On', 'Mixer/Fill5On',
-    'Mixer/TurnMixerOn', 'Mixer/MixerIsOn', 'Mixer/InFlowMix', 'Mixer/OutFlowMix',
-    'Pasteurizer/OpenDumpValve', 'Pasteurizer/Level', 'Pasteurizer/OpenOutlet',
-    'Pasteurizer/HeaterOn', 'Pasteurizer/Temperature', 'Pasteurizer/CoolerOn',
-    'Pasteurizer/InFlowMix', 'Pasteurizer/OutFlowMix',
-    'Homogenizer/ParticleSize', 'Homogenizer/HomogenizerOn',
-    'Homogenizer/Valve1/InFlowMix', 'Homogenizer/Valve2/OutFlowMix',
-    'AgeingCooling/OpenDumpValve', 'AgeingCooling/Level', 'AgeingCooling/Temperature',
-    'AgeingCooling/InFlowMix', 'AgeingCooling/OpenOutlet', 'AgeingCooling/AgeingCoolingOn',
-    'AgeingCooling/OutFlowMix',
-    'DynamicFreezer/OpenDumpValve', 'DynamicFreezer/Level', 'DynamicFreezer/OpenOutlet',
-    'DynamicFreezer/HeaterOn', 'DynamicFreezer/Temperature', 'DynamicFreezer/SolidFlavoringOn',
-    'DynamicFreezer/LiquidFlavoringOn', 'DynamicFreezer/FreezerOn', 'DynamicFreezer/DasherOn',
-    'DynamicFreezer/Overrun', 'DynamicFreezer/SendTestValues', 'DynamicFreezer/ParticleSize',
-    'DynamicFreezer/BarrelRotationSpeed', 'DynamicFreezer/PasteurizationUnits',
-    'DynamicFreezer/InFlowMix', 'DynamicFreezer/OutFlowMix',
-    'Hardening/Packages', 'Hardening/OpenDumpValve', 'Hardening/Temperature',
-    'Hardening/HardeningOn', 'Hardening/FinishBatchOn', 'Hardening/InFlowMix'
-]
-
-def load_model():
-    """Load the trained XGBoost model"""
-    global model
+schema = DEFAULT_SCHEMA
+drift_monitor = None
+module_ensemble = None
+
+# Feature columns (54 total as per your model training), shared via feature_schema.py
+FEATURE_COLUMNS = schema.columns
+
+def load_model(model_path=None):
+    """Load the trained XGBoost model and the feature schema embedded in it"""
+    global model, schema, FEATURE_COLUMNS
     try:
-        model_path = 'models/anomaly_detector.pkl'
+        model_path = model_path or os.environ.get('MODEL_PATH', 'models/anomaly_detector.pkl')
         if os.path.exists(model_path):
-            model = joblib.load(model_path)
-            logger.info("Model loaded successfully")
+            loaded = joblib.load(model_path)
+            # Refuse to serve a model whose features do not line up with the schema
+            schema = FeatureSchema.from_booster(loaded)
+            FEATURE_COLUMNS = schema.columns
+            model = loaded
+            logger.info(f"Model loaded successfully (feature schema {schema.fingerprint})")
+            load_module_models()
+            load_drift_reference()
             return True
         else:
             logger.error(f"Model file not found: {model_path}")
             return False
+    except SchemaMismatchError as e:
+        logger.error(f"Model/feature schema mismatch: {str(e)}")
+        return False
     except Exception as e:
         logger.error(f"Error loading model: {str(e)}")
         return False
 
-def identify_anomaly_parameter(input_data, anomaly_type):
+def load_drift_reference():
+    """Start drift monitoring if the training run saved a reference profile"""
+    global drift_monitor
+    # The ensemble predicts its own class mix, so it has its own reference
+    default_path = 'models/drift_reference_modules.json' if module_ensemble is not None else 'models/drift_reference.json'
+    reference_path = os.environ.get('DRIFT_REFERENCE_PATH', default_path)
+    if not os.path.exists(reference_path):
+        logger.warning(f"Drift reference not found, drift monitoring disabled: {reference_path}")
+        return
+    try:
+        drift_monitor = DriftMonitor.from_file(reference_path, schema)
+        logger.info("Drift monitoring enabled")
+    except Exception as e:
+        logger.error(f"Error loading drift reference: {str(e)}")
+
+def load_module_models():
+    """Score with the per-module models only when SCORING_MODE=modules opts in"""
+    global module_ensemble
+    module_ensemble = None
+    if os.environ.get('SCORING_MODE', 'monolithic') != 'modules':
+        logger.info("Scoring with the monolithic model")
+        return
+    modules_path = os.environ.get('MODULE_MODELS_PATH', 'models/module_models.pkl')
+    if not os.path.exists(modules_path):
+        logger.error(f"Module models not found, using the monolithic model: {modules_path}")
+        return
+    try:
+        module_ensemble = ModuleEnsemble.from_file(modules_path, schema)
+        logger.info(f"Scoring with per-module models: {', '.join(module_ensemble.modules)}")
+    except Exception as e:
+        logger.error(f"Error loading module models, using the monolithic model: {str(e)}")
+
+def prepare_features(df):
+    """Return the feature matrix in schema column order and which columns were sent"""
+    # Missing features stay NaN and are rejected by validation, not filled with 0
+    return schema.to_matrix(df), schema.present_mask(df.columns)
+
+def score_matrix(X):
+    """Run the model on a feature matrix; returns (probabilities, predicted codes)"""
+    import xgboost as xgb
+    dmatrix = xgb.DMatrix(X, feature_names=schema.columns)
+    prediction_probs = model.predict(dmatrix)
+    return prediction_probs, np.argmax(prediction_probs, axis=1)
+
+# Last frame received per line, for stuck-feed detection across requests.
+# line_id is client-supplied, so only the most recently used lines are kept.
+MAX_TRACKED_LINES = int(os.environ.get('MAX_TRACKED_LINES', 1024))
+last_readings = OrderedDict()
+last_readings_lock = threading.Lock()
+
+def get_last_reading(line_id):
+    with last_readings_lock:
+        return last_readings.get(line_id)
+
+def remember_reading(line_id, values):
+    with last_readings_lock:
+        last_readings[line_id] = values
+        last_readings.move_to_end(line_id)
+        while len(last_readings) > MAX_TRACKED_LINES:
+            last_readings.popitem(last=False)
+
+def predict_frame(df, line_id=None, line_ids=None, check_stuck=True):
     """
-    Identify which parameter is most likely affected by the anomaly
-    This is a simplified logic - you can enhance with more sophisticated analysis
+    Validate and score every row of a DataFrame.
+    Rows are consecutive frames of `line_id`, or, with `line_ids`, one frame
+    per listed line (each checked against that line's own previous frame).
+    The stuck-feed check needs a known line, so it is skipped without one.
+    Returns (results, rejected): one result dict per valid row and the
+    validation errors for each row that was skipped before scoring.
     """
-    if anomaly_type == "Normal":
-        return "No Anomaly"
+    X, present = prepare_features(df)
+    if line_ids is not None:
+        previous = np.full(X.shape, np.nan, dtype=X.dtype)
+        for i, line in enumerate(line_ids):
+            last = get_last_reading(line)
+            if last is not None:
+                previous[i] = last
+        validation = validate_batch(X, schema, present, previous_frames=previous)
+        for i, line in enumerate(line_ids):
+            remember_reading(line, X[i])
+    else:
+        check_stuck = check_stuck and line_id is not None
+        validation = validate_batch(X, schema, present, get_last_reading(line_id) if check_stuck else None,
+                                    check_stuck=check_stuck)
+        if check_stuck and len(X):
+            remember_reading(line_id, X[-1])
     
-    # Group parameters by module
-    modules = {
-        'Mixer': [col for col in FEATURE_COLUMNS if col.startswith('Mixer/')],
-        'Pasteurizer': [col for col in FEATURE_COLUMNS if col.startswith('Pasteurizer/')],
-        'Homogenizer': [col for col in FEATURE_COLUMNS if col.startswith('Homogenizer/')],
-        'AgeingCooling': [col for col in FEATURE_COLUMNS if col.startswith('AgeingCooling/')],
-        'DynamicFreezer': [col for col in FEATURE_COLUMNS if col.startswith('DynamicFreezer/')],
-        'Hardening': [col for col in FEATURE_COLUMNS if col.startswith('Hardening/')]
-    }
+    rejected = [
+        {"row_id": int(i), "errors": validation.describe(i)}
+        for i in validation.invalid_rows
+    ]
+    rows = np.flatnonzero(validation.valid)
+    if len(rows) == 0:
+        return [], rejected
     
-    # Simple heuristic: check which parameters have unusual values
-    # This is simplified - in real scenarios, you'd use feature importance or SHAP values
-    suspected_params = []
+    X = X[rows]
+    scoring_started = time.perf_counter()
+    if module_ensemble is not None:
+        prediction_probs, predictions, fired_modules = module_ensemble.score(X)
+    else:
+        prediction_probs, predictions = score_matrix(X)
+        fired_modules = None
+    confidences = prediction_probs[np.arange(len(predictions)), predictions]
+    if drift_monitor is not None:
+        drift_monitor.update(X, predictions, confidences, time.perf_counter() - scoring_started)
     
-    for module, params in modules.items():
-        for param in params:
-            if param in input_data.columns:
-                value = input_data[param].iloc[0]
-                # Check for suspicious patterns based on anomaly type
-                if anomaly_type == "Freeze" and value == 0:
-                    suspected_params.append(param)
-                elif anomaly_type == "Step" and abs(value) > 300:  # Temperature step changes
-                    suspected_params.append(param)
-                elif anomaly_type == "Ramp" and value > 1:  # Gradually increasing values
-                    suspected_params.append(param)
+    # Identify parameter for anomaly
+    parameters = identify_anomaly_parameters(X, predictions, schema, fired_modules)
     
-    # Return the most likely suspect or a default
-    if suspected_params:
-        return suspected_params[0]
-    else:
-        # Default fallback based on common failure points
-        defaults = {
-            "Freeze": "DynamicFreezer/Temperature",
-            "Step": "Pasteurizer/Temperature", 
-            "Ramp": "Mixer/Level"
+    warned = set(validation.warned_rows.tolist())
+    results = []
+    for i, pred in enumerate(predictions):
+        row_id = int(rows[i])
+        result = {
+            "row_id": row_id,
+            "anomaly_type": anomaly_mapping[pred],
+            "anomaly_code": int(pred),
+            "confidence": float(confidences[i]),
+            "parameter_for_anomaly": parameters[i],
+            "timestamp": datetime.now().isoformat(),
+            "all_probabilities": {
+                anomaly_mapping[j]: float(prob) 
+                for j, prob in enumerate(prediction_probs[i])
+            },
+            # Scored, but some readings lie outside what the model saw in training
+            "warnings": validation.describe(row_id, bits=OUTSIDE_TRAINING) if row_id in warned else []
         }
-        return defaults.get(anomaly_type, "Unknown")
+        results.append(result)
+    
+    return results, rejected
+
+# Live stream: one scoring loop shared by every connected dashboard
+STREAM_LINES = [line.strip() for line in os.environ.get('STREAM_LINES', 'line-1').split(',') if line.strip()]
+stream_generator = IceCreamDataGenerator()
+
+def _stream_sample(line_id):
+    sample = stream_generator.generate_real_time_sample()
+    sample.pop('Timestamp', None)
+    return {key: float(value) for key, value in sample.items()}
+
+def _stream_score(samples):
+    # One row per line; rejected rows come back as None
+    results, rejected = predict_frame(pd.DataFrame(samples), line_ids=STREAM_LINES)
+    for entry in rejected:
+        logger.warning(f"Live sample for {STREAM_LINES[entry['row_id']]} rejected: {entry['errors']}")
+    aligned = [None] * len(samples)
+    for result in results:
+        aligned[result["row_id"]] = result
+    return aligned
+
+stream_hub = PredictionStreamHub(
+    score_fn=_stream_score,
+    sample_fn=_stream_sample,
+    lines=STREAM_LINES,
+    interval=float(os.environ.get('STREAM_INTERVAL', 2.0)),
+    max_queue=int(os.environ.get('STREAM_QUEUE_SIZE', 100)),
+    # Listeners (store, episodes) alone do not keep the loop scoring unless opted in
+    always_on=os.environ.get('STREAM_ALWAYS_ON', '0') == '1'
+)
+
+# Every prediction is persisted by a background writer, off the request path
+prediction_store = PredictionStore(os.environ.get('PREDICTION_DB', 'data/predictions.db'))
+stream_hub.listeners.append(
+    lambda line_id, sample, prediction: prediction_store.record(line_id, prediction)
+)
+
+# Row-level predictions are collapsed into episodes; only transitions go downstream
+episode_tracker = EpisodeTracker(
+    open_after=int(os.environ.get('EPISODE_OPEN_AFTER', 3)),
+    close_after=int(os.environ.get('EPISODE_CLOSE_AFTER', 5)),
+    open_confidence=float(os.environ.get('EPISODE_OPEN_CONFIDENCE', 0.7)),
+    hold_confidence=float(os.environ.get('EPISODE_HOLD_CONFIDENCE', 0.5)),
+    max_lines=MAX_TRACKED_LINES
+)
+stream_hub.listeners.append(
+    lambda line_id, sample, prediction: episode_tracker.update(line_id, prediction)
+)
+episode_tracker.listeners.append(lambda event: stream_hub.publish("episode", event))
+
+def parse_classes(value):
+    """Turn 'Step,Ramp' or '2,3' into a list of anomaly codes"""
+    if not value:
+        return None
+    codes_by_name = {name.lower(): code for code, name in anomaly_mapping.items()}
+    codes = []
+    for item in value.split(','):
+        item = item.strip()
+        if item.isdigit() and int(item) in anomaly_mapping:
+            codes.append(int(item))
+        elif item.lower() in codes_by_name:
+            codes.append(codes_by_name[item.lower()])
+        else:
+            raise ValueError(f"Unknown anomaly class: {item}")
+    return codes
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -131,51 +283,21 @@ def predict_anomaly():
         else:
             df = pd.DataFrame([data])
         
-        # Ensure all required features are present
-        missing_features = set(FEATURE_COLUMNS) - set(df.columns)
-        if missing_features:
-            # Fill missing features with 0 (or you could return an error)
-            for feature in missing_features:
-                df[feature] = 0
-        
-        # Select only the required features in the correct order
-        input_features = df[FEATURE_COLUMNS]
-        
         # Make prediction
         if model is None:
             return jsonify({"error": "Model not loaded"}), 500
         
-        # Create DMatrix for XGBoost
-        import xgboost as xgb
-        dmatrix = xgb.DMatrix(input_features)
-        
-        # Get predictions
-        prediction_probs = model.predict(dmatrix)
-        predictions = np.argmax(prediction_probs, axis=1)
-        
-        results = []
-        for i, pred in enumerate(predictions):
-            anomaly_type = anomaly_mapping[pred]
-            confidence = float(prediction_probs[i][pred])
-            
-            # Identify parameter for anomaly
-            parameter_for_anomaly = identify_anomaly_parameter(input_features.iloc[[i]], anomaly_type)
-            
-            result = {
-                "anomaly_type": anomaly_type,
-                "anomaly_code": int(pred),
-                "confidence": confidence,
-                "parameter_for_anomaly": parameter_for_anomaly,
-                "timestamp": datetime.now().isoformat(),
-                "all_probabilities": {
-                    anomaly_mapping[j]: float(prob) 
-                    for j, prob in enumerate(prediction_probs[i])
-                }
-            }
-            results.append(result)
+        # Anonymous callers are not one feed, so only a given line_id gets the stuck-feed check
+        line_id = request.args.get('line_id')
+        results, rejected = predict_frame(df, line_id)
+        line_id = line_id or 'default'
+        prediction_store.record_many(line_id, results)
+        episode_events = episode_tracker.update_many(line_id, results)
         
         return jsonify({
             "predictions": results,
+            "rejected_rows": rejected,
+            "episode_events": episode_events,
             "status": "success"
         })
         
@@ -195,36 +317,33 @@ def batch_predict():
         batch_data = data['batch_data']
         df = pd.DataFrame(batch_data)
         
-        # Process similar to single prediction
-        missing_features = set(FEATURE_COLUMNS) - set(df.columns)
-        for feature in missing_features:
-            df[feature] = 0
-        
-        input_features = df[FEATURE_COLUMNS]
+        if model is None:
+            return jsonify({"error": "Model not loaded"}), 500
         
-        import xgboost as xgb
-        dmatrix = xgb.DMatrix(input_features)
-        prediction_probs = model.predict(dmatrix)
-        predictions = np.argmax(prediction_probs, axis=1)
+        # Process similar to single prediction
+        line_id = data.get('line_id', 'batch')
+        # Uploaded batches are archives, not a live feed (as in bulk_score.py)
+        predictions, rejected = predict_frame(df, check_stuck=False)
+        prediction_store.record_many(line_id, predictions)
+        episode_events = episode_tracker.update_many(line_id, predictions)
         
         results = []
-        for i, pred in enumerate(predictions):
-            anomaly_type = anomaly_mapping[pred]
-            confidence = float(prediction_probs[i][pred])
-            parameter_for_anomaly = identify_anomaly_parameter(input_features.iloc[[i]], anomaly_type)
-            
+        for prediction in predictions:
             result = {
-                "row_id": i,
-                "anomaly_type": anomaly_type,
-                "anomaly_code": int(pred),
-                "confidence": confidence,
-                "parameter_for_anomaly": parameter_for_anomaly
+                "row_id": prediction["row_id"],
+                "anomaly_type": prediction["anomaly_type"],
+                "anomaly_code": prediction["anomaly_code"],
+                "confidence": prediction["confidence"],
+                "parameter_for_anomaly": prediction["parameter_for_anomaly"]
             }
             results.append(result)
         
         return jsonify({
             "batch_predictions": results,
+            "rejected_rows": rejected,
+            "episode_events": episode_events,
             "total_processed": len(results),
+            "total_rejected": len(rejected),
             "status": "success"
         })
         
@@ -236,25 +355,9 @@ def batch_predict():
 def simulate_data():
     """Generate simulated sensor data for testing"""
     try:
-        # Generate realistic simulated data
-        np.random.seed(42)
-        
-        simulated_data = {}
-        
-        # Mixer parameters
-        simulated_data['Mixer/OpenDumpValve'] = 0
-        simulated_data['Mixer/Level'] = np.random.uniform(0.1, 0.9)
-        simulated_data['Mixer/Temperature'] = np.random.uniform(275, 278)
-        simulated_data['Mixer/OpenOutlet'] = np.random.choice([0, 1])
-        for i in range(1, 6):
-            simulated_data[f'Mixer/Fill{i}On'] = np.random.choice([0, 1])
-        simulated_data['Mixer/TurnMixerOn'] = 1
-        simulated_data['Mixer/MixerIsOn'] = 1
-        simulated_data['Mixer/InFlowMix'] = np.random.uniform(0, 10)
-        simulated_data['Mixer/OutFlowMix'] = np.random.uniform(0, 10)
-        
-        # Continue for all modules...
-        # (Add similar patterns for other modules)
+        # Generate realistic simulated data for every feature, so the
+        # sample passes input validation (missing features are rejected)
+        simulated_data = _stream_sample('simulated')
         
         return jsonify({
             "simulated_data": simulated_data,
@@ -264,6 +367,123 @@ def simulate_data():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/stream', methods=['GET'])
+def stream_predictions():
+    """Server-Sent Events feed of new predictions and state changes per line"""
+    if model is None:
+        return jsonify({"error": "Model not loaded"}), 500
+    
+    lines = request.args.get('lines')
+    lines = [line for line in lines.split(',') if line] if lines else None
+    unknown = set(lines or []) - set(STREAM_LINES)
+    if unknown:
+        return jsonify({"error": f"Unknown lines: {sorted(unknown)}"}), 400
+    
+    subscriber = stream_hub.subscribe(lines)
+    response = Response(stream_with_context(stream_hub.event_stream(subscriber)),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/stream/lines', methods=['GET'])
+def stream_lines():
+    """List the lines available on the live stream"""
+    return jsonify({
+        "lines": STREAM_LINES,
+        "subscribers": stream_hub.subscriber_count(),
+        "interval_seconds": stream_hub.interval
+    })
+
+@app.route('/history', methods=['GET'])
+def prediction_history():
+    """Stored predictions filtered by time range, class and line"""
+    try:
+        classes = parse_classes(request.args.get('class'))
+        rows = prediction_store.query(
+            start=request.args.get('start'),
+            end=request.args.get('end'),
+            classes=classes,
+            line_id=request.args.get('line_id'),
+            limit=min(int(request.args.get('limit', 1000)), 10000)
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"History query error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+    
+    for row in rows:
+        row["anomaly_type"] = anomaly_mapping[row["anomaly_code"]]
+    return jsonify({
+        "predictions": rows,
+        "count": len(rows),
+        "status": "success"
+    })
+
+@app.route('/history/rollups', methods=['GET'])
+def prediction_rollups():
+    """Per-minute anomaly counts, maintained incrementally by the store"""
+    try:
+        buckets = prediction_store.rollups(
+            start=request.args.get('start'),
+            end=request.args.get('end'),
+            line_id=request.args.get('line_id')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Rollup query error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+    
+    rollups = []
+    for minute, counts in buckets:
+        rollups.append({
+            "minute": minute,
+            "total": sum(counts.values()),
+            "anomalies": sum(count for code, count in counts.items() if code != 0),
+            "by_class": {anomaly_mapping[code]: count for code, count in counts.items()}
+        })
+    return jsonify({
+        "rollups": rollups,
+        "status": "success"
+    })
+
+@app.route('/episodes', methods=['GET'])
+def episode_feed():
+    """Episode open/close events after a sequence number (poll with ?since=)"""
+    try:
+        since = int(request.args.get('since', 0))
+        limit = min(int(request.args.get('limit', 100)), 1000)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    events = episode_tracker.feed(since=since, line_id=request.args.get('line_id'), limit=limit)
+    return jsonify({
+        "events": events,
+        "next_since": events[-1]["sequence"] if events else since,
+        "status": "success"
+    })
+
+@app.route('/episodes/open', methods=['GET'])
+def open_episodes():
+    """Episodes currently in progress"""
+    return jsonify({
+        "episodes": episode_tracker.open_episodes(line_id=request.args.get('line_id')),
+        "status": "success"
+    })
+
+@app.route('/drift', methods=['GET'])
+def drift_report():
+    """Input and prediction drift against the training reference profile"""
+    if drift_monitor is None:
+        return jsonify({"error": "Drift monitoring is not enabled (no reference profile)"}), 404
+    try:
+        top = min(int(request.args.get('top', 10)), len(schema.columns))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({**drift_monitor.report(top=top), "status": "success"})
+
 @app.route('/model_info', methods=['GET'])
 def model_info():
     """Get model information"""
@@ -271,6 +491,9 @@ def model_info():
         info = {
             "model_loaded": model is not None,
             "feature_count": len(FEATURE_COLUMNS),
+            "feature_schema": schema.fingerprint,
+            "scoring_mode": "modules" if module_ensemble is not None else "monolithic",
+            "modules": {module: len(columns) for module, columns in schema.modules.items()},
             "anomaly_types": list(anomaly_mapping.values()),
             "feature_columns": FEATURE_COLUMNS
         }
@@ -282,6 +505,8 @@ if __name__ == '__main__':
     # Load model on startup
     if load_model():
         logger.info("Starting Flask application...")
-        app.run(debug=True, host='0.0.0.0', port=5000)
+        if stream_hub.always_on:
+            stream_hub.start()
+        app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
     else:
         logger.error("Failed to load model. Exiting...")
\ No newline at end of file
@@ -0,0 +1,75 @@
+# attribution.py - Anomaly classes and the sensor blamed for each verdict
+#
+# Kept free of import-time side effects so offline tools (bulk_score.py) and
+# worker processes can use it without pulling in the Flask app.
+
+import numpy as np
+
+from feature_schema import module_of
+
+anomaly_mapping = {0: "Normal", 1: "Freeze", 2: "Step", 3: "Ramp"}
+
+# Default fallback based on common failure points
+DEFAULT_ANOMALY_PARAMETERS = {
+    "Freeze": "DynamicFreezer/Temperature",
+    "Step": "Pasteurizer/Temperature",
+    "Ramp": "Mixer/Level"
+}
+
+# Fallback per module when per-module scoring says which module fired and the
+# per-type default lies in another one
+MODULE_DEFAULT_PARAMETERS = {
+    "Mixer": "Mixer/Level",
+    "Pasteurizer": "Pasteurizer/Temperature",
+    "Homogenizer": "Homogenizer/ParticleSize",
+    "AgeingCooling": "AgeingCooling/Temperature",
+    "DynamicFreezer": "DynamicFreezer/Temperature",
+    "Hardening": "Hardening/Temperature",
+}
+
+# Suspicious patterns per anomaly type, evaluated on a whole (rows x features) block
+ANOMALY_PARAMETER_RULES = {
+    "Freeze": lambda X: X == 0,
+    "Step": lambda X: np.abs(X) > 300,  # Temperature step changes
+    "Ramp": lambda X: X > 1,  # Gradually increasing values
+}
+
+
+def identify_anomaly_parameters(X, predictions, feature_schema, fired_modules=None):
+    """
+    Identify which parameter is most likely affected, for every row at once.
+    X is the (rows x features) matrix in schema order; the first suspicious
+    parameter in module order wins, otherwise the per-type default is used.
+    With fired_modules (per-module scoring) only the columns of the module
+    that fired are considered; the per-type default is kept when it lies in
+    that module, otherwise the module's own default parameter is used.
+    This is simplified - in real scenarios, you'd use feature importance or SHAP values
+    """
+    parameters = np.full(len(predictions), "No Anomaly", dtype=object)
+    ordered = X[:, feature_schema.module_order]
+    ordered_names = feature_schema.names[feature_schema.module_order]
+    if fired_modules is not None:
+        allowed = np.zeros(X.shape, dtype=bool)
+        for module, mask in feature_schema.module_masks.items():
+            allowed[fired_modules == module] = mask
+        allowed = allowed[:, feature_schema.module_order]
+
+    for code, anomaly_type in anomaly_mapping.items():
+        rows = np.flatnonzero(predictions == code)
+        if code == 0 or len(rows) == 0:
+            continue
+        rule = ANOMALY_PARAMETER_RULES.get(anomaly_type)
+        default = DEFAULT_ANOMALY_PARAMETERS.get(anomaly_type, "Unknown")
+        if fired_modules is not None:
+            fired = fired_modules[rows]
+            module_defaults = np.array([MODULE_DEFAULT_PARAMETERS.get(m, default) for m in fired], dtype=object)
+            default = np.where(fired == module_of(default), default, module_defaults)
+        if rule is None:
+            parameters[rows] = default
+            continue
+        hits = rule(ordered[rows])
+        if fired_modules is not None:
+            hits &= allowed[rows]
+        parameters[rows] = np.where(hits.any(axis=1), ordered_names[hits.argmax(axis=1)], default)
+
+    return parameters
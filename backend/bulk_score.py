@@ -0,0 +1,234 @@
+# bulk_score.py - Offline bulk scoring of CSV/Parquet archives with a process pool
+#
+# Usage:
+#   python bulk_score.py "../Labelled Data" --output scored/ --workers 8
+#   python bulk_score.py data/exported_data.csv --output scored/ --chunk-size 200000
+#
+# Input files are read in chunks, each chunk is scored by a worker process that
+# loaded the Booster once at startup, and the result is written as its own
+# Parquet part file. Finished chunks are recorded in a checkpoint so an
+# interrupted run picks up where it stopped.
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from attribution import anomaly_mapping, identify_anomaly_parameters
+from feature_schema import FeatureSchema
+from validation import validate_batch
+
+# Identifier columns copied through to the output when present in the input
+PASSTHROUGH_COLUMNS = ['number', 'Timestamp', 'Run id', 'Anomaly']
+CHECKPOINT_FILE = '_checkpoint.json'
+
+# Per-worker state, populated once by init_worker
+worker_model = None
+worker_schema = None
+
+
+def load_model(model_path):
+    """Load the Booster and its embedded feature schema (raises on a mismatch)"""
+    import xgboost  # noqa: F401  (needed to unpickle the Booster)
+    booster = joblib.load(model_path)
+    return booster, FeatureSchema.from_booster(booster)
+
+
+def init_worker(model_path):
+    global worker_model, worker_schema
+    worker_model, worker_schema = load_model(model_path)
+
+
+def discover_inputs(paths):
+    """Expand files, directories and glob patterns into a sorted list of data files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = glob.glob(os.path.join(path, '*.csv')) + glob.glob(os.path.join(path, '*.parquet'))
+        else:
+            candidates = glob.glob(path)
+        files.extend(f for f in candidates if f.endswith(('.csv', '.parquet')))
+    return sorted(set(files))
+
+
+def iter_chunks(path, chunk_size, feature_columns):
+    """Yield (chunk_index, first_row, DataFrame) without loading the whole file"""
+    wanted = set(feature_columns) | set(PASSTHROUGH_COLUMNS)
+    first_row = 0
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        columns = [c for c in parquet_file.schema_arrow.names if c in wanted]
+        for index, batch in enumerate(parquet_file.iter_batches(batch_size=chunk_size, columns=columns)):
+            chunk = batch.to_pandas()
+            yield index, first_row, chunk
+            first_row += len(chunk)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_size, usecols=lambda c: c in wanted)
+        for index, chunk in enumerate(reader):
+            yield index, first_row, chunk
+            first_row += len(chunk)
+
+
+def score_chunk(chunk, first_row, part_path, output_format):
+    """Score one chunk in a worker and write it as a part file; returns row count"""
+    import xgboost as xgb
+
+    missing = [c for c in worker_schema.columns if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Input is missing {len(missing)} feature columns, e.g. {missing[:3]}")
+
+    X = worker_schema.to_matrix(chunk)
+    # Archived runs are not a live feed, so repeated frames are not screened out
+    validation = validate_batch(X, worker_schema, check_stuck=False)
+    rows = np.flatnonzero(validation.valid)
+
+    # Rows failing validation are written with code -1 and never reach the model
+    n_classes = len(anomaly_mapping)
+    prediction_probs = np.full((len(chunk), n_classes), np.nan, dtype=np.float32)
+    predictions = np.full(len(chunk), -1, dtype=np.int8)
+    if len(rows):
+        dmatrix = xgb.DMatrix(X[rows], feature_names=worker_schema.columns)
+        prediction_probs[rows] = worker_model.predict(dmatrix)
+        predictions[rows] = np.argmax(prediction_probs[rows], axis=1)
+
+    result = pd.DataFrame({'source_row': np.arange(first_row, first_row + len(chunk))})
+    for column in PASSTHROUGH_COLUMNS:
+        if column in chunk.columns:
+            result[column] = chunk[column].to_numpy()
+    result['validation_reasons'] = validation.reasons
+    result['anomaly_code'] = predictions
+    result['anomaly_type'] = pd.Categorical.from_codes(predictions, list(anomaly_mapping.values()))
+    result['confidence'] = np.nan
+    result.loc[rows, 'confidence'] = prediction_probs[rows, predictions[rows]]
+    for code, name in anomaly_mapping.items():
+        result[f'prob_{name}'] = prediction_probs[:, code]
+
+    parameters = np.full(len(chunk), None, dtype=object)
+    parameters[rows] = identify_anomaly_parameters(X[rows], predictions[rows], worker_schema)
+    result['parameter_for_anomaly'] = parameters
+
+    tmp_path = part_path + '.tmp'
+    if output_format == 'parquet':
+        result.to_parquet(tmp_path, index=False)
+    else:
+        result.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, part_path)
+    return len(result)
+
+
+def load_checkpoint(output_dir, chunk_size):
+    """
+    Chunk keys already scored into output_dir. Keys are only meaningful for
+    the chunk size they were cut with, so resuming with another size is refused.
+    """
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('chunk_size') != chunk_size:
+        raise SystemExit(f"{path} was written with --chunk-size {checkpoint.get('chunk_size')}, "
+                         f"not {chunk_size}; rerun with that size, a new --output or --no-resume")
+    return set(checkpoint['completed'])
+
+
+def save_checkpoint(output_dir, completed, chunk_size):
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'chunk_size': chunk_size, 'completed': sorted(completed)}, f)
+    os.replace(path + '.tmp', path)
+
+
+def part_prefix(path):
+    """Output prefix unique per input file, even when two inputs share a file name"""
+    full_path = os.path.abspath(path)
+    stem = os.path.splitext(os.path.basename(full_path))[0]
+    return f"{stem}-{hashlib.sha1(full_path.encode('utf-8')).hexdigest()[:8]}"
+
+
+def run(inputs, output_dir, model_path, workers, chunk_size, output_format, resume=True):
+    files = discover_inputs(inputs)
+    if not files:
+        raise SystemExit("No CSV or Parquet files found in the given inputs")
+
+    # Validate the model against its schema once up front rather than in every worker
+    _, feature_schema = load_model(model_path)
+
+    os.makedirs(output_dir, exist_ok=True)
+    completed = load_checkpoint(output_dir, chunk_size) if resume else set()
+    if completed:
+        print(f"Resuming: {len(completed)} chunks already scored")
+
+    # At most two chunks per worker are in memory at any time
+    max_in_flight = workers * 2
+    in_flight = {}
+    total_rows = 0
+    started = time.monotonic()
+
+    def collect(done):
+        nonlocal total_rows
+        for future in done:
+            key = in_flight.pop(future)
+            total_rows += future.result()
+            completed.add(key)
+            save_checkpoint(output_dir, completed, chunk_size)
+        elapsed = time.monotonic() - started
+        print(f"  {total_rows:,} rows scored | {total_rows / max(elapsed, 1e-9):,.0f} rows/sec | "
+              f"{elapsed:.1f}s elapsed", flush=True)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(model_path,)) as pool:
+        for path in files:
+            full_path = os.path.abspath(path)
+            prefix = part_prefix(path)
+            print(f"Scoring {path}")
+            for index, first_row, chunk in iter_chunks(path, chunk_size, feature_schema.columns):
+                key = f"{full_path}:{index}"
+                if key in completed:
+                    continue
+                part_path = os.path.join(output_dir, f"{prefix}.part-{index:05d}.{output_format}")
+                future = pool.submit(score_chunk, chunk, first_row, part_path, output_format)
+                in_flight[future] = key
+                del chunk
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    elapsed = time.monotonic() - started
+    print(f"Done: {total_rows:,} rows in {elapsed:.1f}s ({total_rows / max(elapsed, 1e-9):,.0f} rows/sec)")
+    return total_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-score CSV/Parquet archives with the anomaly model")
+    parser.add_argument('inputs', nargs='+', help="Files, directories or glob patterns to score")
+    parser.add_argument('--output', '-o', required=True, help="Directory for scored part files")
+    parser.add_argument('--model', default='models/anomaly_detector.pkl', help="Path to the trained model")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=100000, help="Rows per chunk")
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet')
+    parser.add_argument('--no-resume', action='store_true', help="Ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        print(f"Model file not found: {args.model}", file=sys.stderr)
+        return 1
+
+    run(args.inputs, args.output, args.model, args.workers, args.chunk_size,
+        args.format, resume=not args.no_resume)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
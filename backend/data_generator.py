@@ -5,6 +5,8 @@ import numpy as np
 from datetime import datetime, timedelta
 import json
 
+from feature_schema import FEATURE_COLUMNS
+
 class IceCreamDataGenerator:
     """
     Generates realistic ice cream factory sensor data for testing
@@ -13,27 +15,7 @@ class IceCreamDataGenerator:
     
     def __init__(self, seed=42):
         np.random.seed(seed)
-        self.feature_columns = [
-            'Mixer/OpenDumpValve', 'Mixer/Level', 'Mixer/Temperature', 'Mixer/OpenOutlet',
-            'Mixer/Fill1On', 'Mixer/Fill2On', 'Mixer/Fill3On', 'Mixer/Fill4On', 'Mixer/Fill5On',
-            'Mixer/TurnMixerOn', 'Mixer/MixerIsOn', 'Mixer/InFlowMix', 'Mixer/OutFlowMix',
-            'Pasteurizer/OpenDumpValve', 'Pasteurizer/Level', 'Pasteurizer/OpenOutlet',
-            'Pasteurizer/HeaterOn', 'Pasteurizer/Temperature', 'Pasteurizer/CoolerOn',
-            'Pasteurizer/InFlowMix', 'Pasteurizer/OutFlowMix',
-            'Homogenizer/ParticleSize', 'Homogenizer/HomogenizerOn',
-            'Homogenizer/Valve1/InFlowMix', 'Homogenizer/Valve2/OutFlowMix',
-            'AgeingCooling/OpenDumpValve', 'AgeingCooling/Level', 'AgeingCooling/Temperature',
-            'AgeingCooling/InFlowMix', 'AgeingCooling/OpenOutlet', 'AgeingCooling/AgeingCoolingOn',
-            'AgeingCooling/OutFlowMix',
-            'DynamicFreezer/OpenDumpValve', 'DynamicFreezer/Level', 'DynamicFreezer/OpenOutlet',
-            'DynamicFreezer/HeaterOn', 'DynamicFreezer/Temperature', 'DynamicFreezer/SolidFlavoringOn',
-            'DynamicFreezer/LiquidFlavoringOn', 'DynamicFreezer/FreezerOn', 'DynamicFreezer/DasherOn',
-            'DynamicFreezer/Overrun', 'DynamicFreezer/SendTestValues', 'DynamicFreezer/ParticleSize',
-            'DynamicFreezer/BarrelRotationSpeed', 'DynamicFreezer/PasteurizationUnits',
-            'DynamicFreezer/InFlowMix', 'DynamicFreezer/OutFlowMix',
-            'Hardening/Packages', 'Hardening/OpenDumpValve', 'Hardening/Temperature',
-            'Hardening/HardeningOn', 'Hardening/FinishBatchOn', 'Hardening/InFlowMix'
-        ]
+        self.feature_columns = list(FEATURE_COLUMNS)
     
     def generate_normal_data(self, n_samples=100):
         """Generate normal operating condition data"""
@@ -0,0 +1,238 @@
+# drift_monitor.py - Constant-memory drift statistics for inputs and predictions
+#
+# At training time (Model/model.py) build_reference_profile() bins every feature
+# at the training-set deciles and records the predicted class mix and
+# confidence distribution. At serving time DriftMonitor keeps histograms over
+# exactly those bins, updated once per scored batch, and compares them with
+# the reference using PSI and a binned Kolmogorov-Smirnov distance.
+#
+# Fixed reference bins are used instead of t-digests: PSI/KS need both sides
+# on the same bins anyway, the memory is a fixed (features x bins) array, and
+# one batch update is a single broadcast comparison against every feature's
+# edges plus one bincount, with no per-feature Python loop.
+
+import json
+import threading
+import time
+
+import numpy as np
+
+PSI_EPSILON = 1e-4
+CONFIDENCE_EDGES = np.linspace(0.25, 1.0, 16)[1:-1]  # multi:softprob over 4 classes: >= 0.25
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+
+def _proportions(counts):
+    total = counts.sum()
+    if total <= 0:
+        return np.full(len(counts), 1.0 / len(counts))
+    return counts / total
+
+
+def psi(reference, current):
+    """Population stability index between two binned distributions"""
+    p = np.clip(_proportions(np.asarray(reference, dtype=np.float64)), PSI_EPSILON, None)
+    q = np.clip(_proportions(np.asarray(current, dtype=np.float64)), PSI_EPSILON, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks_distance(reference, current):
+    """Max CDF gap at the bin boundaries (KS statistic at bin resolution)"""
+    p = np.cumsum(_proportions(np.asarray(reference, dtype=np.float64)))
+    q = np.cumsum(_proportions(np.asarray(current, dtype=np.float64)))
+    return float(np.max(np.abs(p - q)))
+
+
+def severity(value):
+    if value >= PSI_SIGNIFICANT:
+        return "significant"
+    if value >= PSI_MODERATE:
+        return "moderate"
+    return "stable"
+
+
+def build_reference_profile(features, schema, prediction_probs, n_bins=10):
+    """
+    Reference profile from training data: per-feature quantile bin edges with
+    the share of rows in each bin, plus class mix and confidence histogram of
+    the model's own predictions. Returns a JSON-serialisable dict.
+
+    Pass rows that look like healthy production traffic (Normal rows, not a
+    class-balanced set), and probabilities from the model as it is served;
+    the two need not come from the same rows.
+    """
+    X = schema.to_matrix(features)
+    quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+    feature_profiles = {}
+    for j, column in enumerate(schema.columns):
+        values = X[:, j][np.isfinite(X[:, j])]
+        edges = np.unique(np.quantile(values, quantiles)) if len(values) else np.array([0.0])
+        counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+        feature_profiles[column] = {
+            "edges": edges.tolist(),
+            "proportions": _proportions(counts.astype(np.float64)).tolist(),
+        }
+
+    predictions = np.argmax(prediction_probs, axis=1)
+    confidences = prediction_probs[np.arange(len(predictions)), predictions]
+    class_counts = np.bincount(predictions, minlength=prediction_probs.shape[1])
+    confidence_counts = np.bincount(np.searchsorted(CONFIDENCE_EDGES, confidences, side='right'),
+                                    minlength=len(CONFIDENCE_EDGES) + 1)
+    return {
+        "schema": schema.fingerprint,
+        "rows": int(len(X)),
+        "features": feature_profiles,
+        "class_mix": _proportions(class_counts.astype(np.float64)).tolist(),
+        "confidence": _proportions(confidence_counts.astype(np.float64)).tolist(),
+    }
+
+
+class DriftMonitor:
+    """
+    Exponentially decayed histograms of live inputs and predictions.
+
+    Counts decay with a half-life measured in rows, so the monitor reflects
+    recent traffic and memory never grows. update() is called once per
+    scored batch; its cost is tracked next to the scoring time the caller
+    reports so the overhead can be checked on the /drift endpoint.
+    """
+
+    def __init__(self, reference, schema, half_life_rows=50000):
+        if reference.get("schema") not in (None, schema.fingerprint):
+            raise ValueError("Drift reference profile was built for a different feature schema")
+        self.reference = reference
+        self.schema = schema
+        self.half_life_rows = half_life_rows
+
+        self.edges = [np.asarray(reference["features"][c]["edges"]) for c in schema.columns]
+        self.reference_counts = [np.asarray(reference["features"][c]["proportions"]) for c in schema.columns]
+        self.n_bins = max(len(e) for e in self.edges) + 1
+        # Edges padded with +inf into one (features x max_edges) array: a value's
+        # bin is the number of its feature's edges <= value, for all features at once
+        self.padded_edges = np.full((len(schema.columns), self.n_bins - 1), np.inf)
+        for j, edges in enumerate(self.edges):
+            self.padded_edges[j, :len(edges)] = edges
+        # Flat bin offset per feature so one bincount covers every feature
+        self.offsets = np.arange(len(schema.columns)) * self.n_bins
+
+        self.feature_counts = np.zeros((len(schema.columns), self.n_bins))
+        self.class_counts = np.zeros(len(reference["class_mix"]))
+        self.confidence_counts = np.zeros(len(CONFIDENCE_EDGES) + 1)
+        self.rows_seen = 0
+        self.update_seconds = 0.0
+        self.scoring_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path, schema, **kwargs):
+        with open(path) as f:
+            return cls(json.load(f), schema, **kwargs)
+
+    def update(self, X, predictions, confidences, scoring_seconds=0.0):
+        """Fold one scored batch (features in schema order) into the histograms"""
+        started = time.perf_counter()
+        n_rows = len(X)
+        if n_rows == 0:
+            return
+
+        # Same bins as searchsorted(edges, x, side='right'); NaN lands in bin 0,
+        # but validation rejects such rows before scoring
+        bins = (X[:, :, None] >= self.padded_edges).sum(axis=2)
+        flat = (bins + self.offsets).ravel()
+        feature_counts = np.bincount(flat, minlength=self.feature_counts.size).reshape(self.feature_counts.shape)
+        class_counts = np.bincount(predictions, minlength=len(self.class_counts))
+        confidence_counts = np.bincount(np.searchsorted(CONFIDENCE_EDGES, confidences, side='right'),
+                                        minlength=len(self.confidence_counts))
+
+        decay = 0.5 ** (n_rows / self.half_life_rows)
+        with self._lock:
+            self.feature_counts *= decay
+            self.feature_counts += feature_counts
+            self.class_counts *= decay
+            self.class_counts += class_counts
+            self.confidence_counts *= decay
+            self.confidence_counts += confidence_counts
+            self.rows_seen += n_rows
+            self.scoring_seconds += scoring_seconds
+            self.update_seconds += time.perf_counter() - started
+
+    def report(self, top=10):
+        """PSI/KS per feature (worst first) plus prediction drift and update overhead"""
+        with self._lock:
+            feature_counts = self.feature_counts.copy()
+            class_counts = self.class_counts.copy()
+            confidence_counts = self.confidence_counts.copy()
+            rows_seen = self.rows_seen
+            update_seconds, scoring_seconds = self.update_seconds, self.scoring_seconds
+
+        features = []
+        for j, column in enumerate(self.schema.columns):
+            n = len(self.reference_counts[j])
+            value = psi(self.reference_counts[j], feature_counts[j, :n])
+            features.append({
+                "feature": column,
+                "psi": value,
+                "ks": ks_distance(self.reference_counts[j], feature_counts[j, :n]),
+                "severity": severity(value),
+            })
+        features.sort(key=lambda f: f["psi"], reverse=True)
+
+        class_psi = psi(self.reference["class_mix"], class_counts)
+        confidence_psi = psi(self.reference["confidence"], confidence_counts)
+        return {
+            "rows_seen": rows_seen,
+            "features": features[:top],
+            "drifted_features": sum(1 for f in features if f["severity"] != "stable"),
+            "predictions": {
+                "class_mix": {
+                    "reference": self.reference["class_mix"],
+                    "current": _proportions(class_counts).tolist(),
+                    "psi": class_psi,
+                    "severity": severity(class_psi),
+                },
+                "confidence": {
+                    "psi": confidence_psi,
+                    "ks": ks_distance(self.reference["confidence"], confidence_counts),
+                    "severity": severity(confidence_psi),
+                },
+            },
+            "overhead": {
+                "update_seconds": update_seconds,
+                "scoring_seconds": scoring_seconds,
+                "ratio": update_seconds / scoring_seconds if scoring_seconds else None,
+            },
+        }
+
+
+# Benchmark: update cost per batch next to the scoring cost of the same batch
+# (the budget is an update under 5% of scoring time); needs a trained model
+if __name__ == "__main__":
+    import app
+    from data_generator import IceCreamDataGenerator
+
+    if not app.load_model():
+        raise SystemExit("A trained model is needed to compare against scoring time (see MODEL_PATH)")
+    schema = app.schema
+    generator = IceCreamDataGenerator()
+    reference_frame = generator.generate_normal_data(50000)
+    reference_probs, _ = app.score_matrix(schema.to_matrix(reference_frame))
+    monitor = DriftMonitor(build_reference_profile(reference_frame, schema, reference_probs), schema)
+
+    def best_of(fn, repeats):
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    for batch_size in (1, 10, 100, 1000, 10000):
+        X = schema.to_matrix(generator.generate_normal_data(batch_size))
+        probs, predictions = app.score_matrix(X)
+        confidences = probs[np.arange(batch_size), predictions]
+        repeats = max(10, 20000 // batch_size)
+        score_time = best_of(lambda: app.score_matrix(X), repeats)
+        update_time = best_of(lambda: monitor.update(X, predictions, confidences), repeats)
+        print(f"batch={batch_size:>6,}: scoring {score_time * 1e6:>9,.0f} us | "
+              f"drift update {update_time * 1e6:>7,.0f} us | ratio {update_time / score_time:.1%}")
@@ -0,0 +1,159 @@
+# episode_tracker.py - Collapse row-level predictions into anomaly episodes
+
+import itertools
+import threading
+from collections import OrderedDict, deque
+
+
+class Episode:
+    """Running summary of one anomaly episode on one line"""
+
+    __slots__ = ('episode_id', 'line_id', 'start', 'end', 'rows', 'peak_confidence',
+                 'class_counts', 'parameter_counts', 'status')
+
+    def __init__(self, line_id, timestamp):
+        self.episode_id = None  # assigned once the episode is confirmed
+        self.line_id = line_id
+        self.start = timestamp
+        self.end = timestamp
+        self.rows = 0
+        self.peak_confidence = 0.0
+        self.class_counts = {}
+        self.parameter_counts = {}
+        self.status = 'pending'
+
+    def add(self, prediction):
+        self.end = prediction.get('timestamp', self.end)
+        self.rows += 1
+        self.peak_confidence = max(self.peak_confidence, prediction['confidence'])
+        anomaly_type = prediction['anomaly_type']
+        self.class_counts[anomaly_type] = self.class_counts.get(anomaly_type, 0) + 1
+        parameter = prediction.get('parameter_for_anomaly')
+        if parameter:
+            self.parameter_counts[parameter] = self.parameter_counts.get(parameter, 0) + 1
+
+    def to_dict(self):
+        return {
+            "episode_id": self.episode_id,
+            "line_id": self.line_id,
+            "status": self.status,
+            "start": self.start,
+            "end": self.end,
+            "rows": self.rows,
+            "peak_confidence": self.peak_confidence,
+            "dominant_class": max(self.class_counts, key=self.class_counts.get),
+            "dominant_parameter": (max(self.parameter_counts, key=self.parameter_counts.get)
+                                   if self.parameter_counts else None),
+        }
+
+
+class LineState:
+    __slots__ = ('episode', 'anomalous_streak', 'normal_streak')
+
+    def __init__(self):
+        self.episode = None
+        self.anomalous_streak = 0
+        self.normal_streak = 0
+
+
+class EpisodeTracker:
+    """
+    Per-line state machine turning predictions into episodes.
+
+    Debouncing: an episode only opens after `open_after` consecutive
+    anomalous rows and only closes after `close_after` consecutive normal
+    rows. Hysteresis: a row must reach `open_confidence` to start an
+    episode but only `hold_confidence` to keep an open one going, so a
+    fault hovering near the threshold does not flap open/closed.
+    Each update is O(1); only open/close transitions reach the feed.
+
+    Line ids can come from clients, so at most `max_lines` lines are kept
+    (least recently updated evicted first); an open episode on an evicted
+    line is closed so it does not vanish from the feed silently.
+    """
+
+    def __init__(self, open_after=3, close_after=5, open_confidence=0.7,
+                 hold_confidence=0.5, max_feed=1000, max_lines=None):
+        self.open_after = open_after
+        self.close_after = close_after
+        self.open_confidence = open_confidence
+        self.hold_confidence = hold_confidence
+        self.listeners = []  # callbacks(event dict) for opened/closed transitions
+        self.max_lines = max_lines
+        self._lines = OrderedDict()
+        self._feed = deque(maxlen=max_feed)
+        self._sequence = itertools.count(1)
+        self._episode_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _is_anomalous(self, state, prediction):
+        if prediction['anomaly_type'] == 'Normal':
+            return False
+        holding = state.episode is not None and state.episode.status == 'open'
+        threshold = self.hold_confidence if holding else self.open_confidence
+        return prediction['confidence'] >= threshold
+
+    def update(self, line_id, prediction):
+        """Feed one prediction; returns the transition event it caused, if any"""
+        evicted = []
+        with self._lock:
+            state = self._lines.get(line_id)
+            if state is None:
+                state = self._lines[line_id] = LineState()
+                if self.max_lines is not None:
+                    while len(self._lines) > self.max_lines:
+                        _, old = self._lines.popitem(last=False)
+                        if old.episode is not None and old.episode.status == 'open':
+                            old.episode.status = 'closed'
+                            evicted.append(self._emit('closed', old.episode))
+            else:
+                self._lines.move_to_end(line_id)
+
+            event = None
+            if self._is_anomalous(state, prediction):
+                state.anomalous_streak += 1
+                state.normal_streak = 0
+                if state.episode is None:
+                    state.episode = Episode(line_id, prediction.get('timestamp'))
+                state.episode.add(prediction)
+                if state.episode.status == 'pending' and state.anomalous_streak >= self.open_after:
+                    state.episode.status = 'open'
+                    state.episode.episode_id = next(self._episode_ids)
+                    event = self._emit('opened', state.episode)
+            else:
+                state.normal_streak += 1
+                state.anomalous_streak = 0
+                if state.episode is not None:
+                    if state.episode.status == 'pending':
+                        # Blip shorter than the debounce window: never surfaced
+                        state.episode = None
+                    elif state.normal_streak >= self.close_after:
+                        state.episode.status = 'closed'
+                        event = self._emit('closed', state.episode)
+                        state.episode = None
+
+        for transition in evicted + ([event] if event is not None else []):
+            for listener in self.listeners:
+                listener(transition)
+        return event
+
+    def update_many(self, line_id, predictions):
+        return [event for event in (self.update(line_id, p) for p in predictions) if event]
+
+    def _emit(self, kind, episode):
+        event = {"sequence": next(self._sequence), "event": kind, **episode.to_dict()}
+        self._feed.append(event)
+        return event
+
+    def feed(self, since=0, line_id=None, limit=100):
+        """Transition events with sequence > since, oldest first"""
+        with self._lock:
+            events = [e for e in self._feed
+                      if e['sequence'] > since and (line_id is None or e['line_id'] == line_id)]
+        return events[:limit]
+
+    def open_episodes(self, line_id=None):
+        with self._lock:
+            return [state.episode.to_dict() for lid, state in self._lines.items()
+                    if state.episode is not None and state.episode.status == 'open'
+                    and (line_id is None or lid == line_id)]
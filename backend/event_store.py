@@ -0,0 +1,221 @@
+# event_store.py - Append-only SQLite store for predictions with per-minute rollups
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import logging
+from collections import Counter
+from contextlib import closing
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    line_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    anomaly_code INTEGER NOT NULL,
+    confidence REAL NOT NULL,
+    parameter TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_ts ON predictions (ts);
+CREATE INDEX IF NOT EXISTS idx_predictions_class_ts ON predictions (anomaly_code, ts);
+CREATE INDEX IF NOT EXISTS idx_predictions_line_ts ON predictions (line_id, ts);
+
+CREATE TABLE IF NOT EXISTS minute_counts (
+    line_id TEXT NOT NULL,
+    minute INTEGER NOT NULL,
+    anomaly_code INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (line_id, minute, anomaly_code)
+) WITHOUT ROWID;
+"""
+
+
+def to_epoch(value):
+    """Accept an ISO string, datetime or epoch number and return epoch seconds"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+class PredictionStore:
+    """
+    Records every prediction off the request path. Callers enqueue rows;
+    a background writer drains the queue in batches, appends them in one
+    transaction and bumps the per-minute counts in the same transaction,
+    so rollups are always consistent with the raw rows.
+    """
+
+    def __init__(self, path, batch_size=500, flush_interval=1.0, max_pending=100000):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --- Write path -----------------------------------------------------
+
+    def record(self, line_id, prediction):
+        """Queue one prediction dict (as returned by /predict) for writing"""
+        row = (
+            line_id,
+            to_epoch(prediction.get("timestamp")) or datetime.now().timestamp(),
+            int(prediction["anomaly_code"]),
+            float(prediction["confidence"]),
+            prediction.get("parameter_for_anomaly"),
+        )
+        try:
+            self._pending.put_nowait(row)
+        except queue.Full:
+            # Never block a request on storage; count the loss instead
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Prediction store backlog full, dropped {self.dropped} rows")
+            return
+        self._ensure_writer()
+
+    def record_many(self, line_id, predictions):
+        for prediction in predictions:
+            self.record(line_id, prediction)
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="prediction-store", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while not (self._stop.is_set() and self._pending.empty()):
+                batch = self._drain()
+                if batch:
+                    try:
+                        self._write(conn, batch)
+                    except sqlite3.Error as e:
+                        logger.error(f"Prediction store write error: {str(e)}")
+        finally:
+            conn.close()
+
+    def _drain(self):
+        """Block up to flush_interval for the first row, then take what is queued"""
+        try:
+            batch = [self._pending.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, conn, batch):
+        minute_counts = Counter((line_id, int(ts // 60), code) for line_id, ts, code, _, _ in batch)
+        with conn:
+            conn.executemany(
+                "INSERT INTO predictions (line_id, ts, anomaly_code, confidence, parameter) "
+                "VALUES (?, ?, ?, ?, ?)",
+                batch,
+            )
+            conn.executemany(
+                "INSERT INTO minute_counts (line_id, minute, anomaly_code, count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (line_id, minute, anomaly_code) DO UPDATE SET count = count + excluded.count",
+                [(line_id, minute, code, count) for (line_id, minute, code), count in minute_counts.items()],
+            )
+        self.written += len(batch)
+
+    def close(self, timeout=10.0):
+        """Flush everything queued and stop the writer"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # --- Read path ------------------------------------------------------
+
+    def query(self, start=None, end=None, classes=None, line_id=None, limit=1000):
+        """Predictions in [start, end), newest first, optionally filtered by class and line"""
+        clauses, params = [], []
+        if line_id is not None:
+            clauses.append("line_id = ?")
+            params.append(line_id)
+        if classes:
+            clauses.append(f"anomaly_code IN ({', '.join('?' * len(classes))})")
+            params.extend(int(code) for code in classes)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(to_epoch(start))
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(to_epoch(end))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        sql = (
+            "SELECT line_id, ts, anomaly_code, confidence, parameter FROM predictions "
+            f"{where} ORDER BY ts DESC LIMIT ?"
+        )
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params + [int(limit)]).fetchall()
+        return [
+            {
+                "line_id": line_id_,
+                "timestamp": datetime.fromtimestamp(ts).isoformat(),
+                "anomaly_code": code,
+                "confidence": confidence,
+                "parameter_for_anomaly": parameter,
+            }
+            for line_id_, ts, code, confidence, parameter in rows
+        ]
+
+    def rollups(self, start=None, end=None, line_id=None):
+        """Per-minute prediction counts by class, oldest first"""
+        clauses, params = [], []
+        if line_id is not None:
+            clauses.append("line_id = ?")
+            params.append(line_id)
+        if start is not None:
+            clauses.append("minute >= ?")
+            params.append(int(to_epoch(start) // 60))
+        if end is not None:
+            clauses.append("minute < ?")
+            params.append(int(-(-to_epoch(end) // 60)))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        sql = (
+            "SELECT minute, anomaly_code, SUM(count) FROM minute_counts "
+            f"{where} GROUP BY minute, anomaly_code ORDER BY minute"
+        )
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        buckets = {}
+        for minute, code, count in rows:
+            bucket = buckets.setdefault(minute, {})
+            bucket[code] = count
+        return [(datetime.fromtimestamp(minute * 60).isoformat(), counts)
+                for minute, counts in buckets.items()]
@@ -0,0 +1,207 @@
+# feature_schema.py - Single source of truth for the model's input features
+#
+# Every component (API, data generator, bulk scorer, training script) takes its
+# feature order from here. The schema is also embedded into the trained Booster
+# as an attribute, so a model always carries the exact column order, dtypes and
+# value ranges it was trained on, and a mismatch is caught at load time.
+
+import hashlib
+import json
+
+import numpy as np
+
+SCHEMA_ATTR = 'feature_schema'
+SCHEMA_VERSION = 1
+
+MODULES = ['Mixer', 'Pasteurizer', 'Homogenizer', 'AgeingCooling', 'DynamicFreezer', 'Hardening']
+
+FEATURE_COLUMNS = [
+    # Mixer Module (13 parameters)
+    'Mixer/OpenDumpValve', 'Mixer/Level', 'Mixer/Temperature', 'Mixer/OpenOutlet',
+    'Mixer/Fill1On', 'Mixer/Fill2On', 'Mixer/Fill3On', 'Mixer/Fill4On', 'Mixer/Fill5On',
+    'Mixer/TurnMixerOn', 'Mixer/MixerIsOn', 'Mixer/InFlowMix', 'Mixer/OutFlowMix',
+
+    # Pasteurizer Module (8 parameters)
+    'Pasteurizer/OpenDumpValve', 'Pasteurizer/Level', 'Pasteurizer/OpenOutlet',
+    'Pasteurizer/HeaterOn', 'Pasteurizer/Temperature', 'Pasteurizer/CoolerOn',
+    'Pasteurizer/InFlowMix', 'Pasteurizer/OutFlowMix',
+
+    # Homogenizer Module (4 parameters)
+    'Homogenizer/ParticleSize', 'Homogenizer/HomogenizerOn',
+    'Homogenizer/Valve1/InFlowMix', 'Homogenizer/Valve2/OutFlowMix',
+
+    # AgeingCooling Module (7 parameters)
+    'AgeingCooling/OpenDumpValve', 'AgeingCooling/Level', 'AgeingCooling/Temperature',
+    'AgeingCooling/InFlowMix', 'AgeingCooling/OpenOutlet', 'AgeingCooling/AgeingCoolingOn',
+    'AgeingCooling/OutFlowMix',
+
+    # DynamicFreezer Module (16 parameters)
+    'DynamicFreezer/OpenDumpValve', 'DynamicFreezer/Level', 'DynamicFreezer/OpenOutlet',
+    'DynamicFreezer/HeaterOn', 'DynamicFreezer/Temperature', 'DynamicFreezer/SolidFlavoringOn',
+    'DynamicFreezer/LiquidFlavoringOn', 'DynamicFreezer/FreezerOn', 'DynamicFreezer/DasherOn',
+    'DynamicFreezer/Overrun', 'DynamicFreezer/SendTestValues', 'DynamicFreezer/ParticleSize',
+    'DynamicFreezer/BarrelRotationSpeed', 'DynamicFreezer/PasteurizationUnits',
+    'DynamicFreezer/InFlowMix', 'DynamicFreezer/OutFlowMix',
+
+    # Hardening Module (6 parameters)
+    'Hardening/Packages', 'Hardening/OpenDumpValve', 'Hardening/Temperature',
+    'Hardening/HardeningOn', 'Hardening/FinishBatchOn', 'Hardening/InFlowMix'
+]
+
+# Columns present in the exported training data that are not model inputs
+NON_FEATURE_COLUMNS = ['number', 'Timestamp', 'Anomaly', 'Parameter for Anomaly', 'Actual value', 'Run id']
+
+
+class SchemaMismatchError(ValueError):
+    """Raised when a model and a feature schema disagree"""
+
+
+def module_of(column):
+    return column.split('/', 1)[0]
+
+
+def is_binary(column):
+    """On/off and open/closed flags: '*On' and 'Open*' parameters"""
+    parameter = column.rsplit('/', 1)[-1]
+    return parameter.endswith('On') or parameter.startswith('Open')
+
+
+def sensor_limits(column):
+    """
+    Fixed bounds of what a sensor can physically report. Readings outside
+    them are impossible and rejected; anything inside is scored, including
+    faults far beyond the training range (a Freeze to 0, a large Step).
+    """
+    parameter = column.rsplit('/', 1)[-1]
+    if is_binary(column):
+        return (0.0, 1.0)
+    if parameter == 'Temperature':
+        return (0.0, float('inf'))  # Kelvin
+    if parameter in ('InFlowMix', 'OutFlowMix', 'ParticleSize', 'Packages', 'Overrun',
+                     'BarrelRotationSpeed', 'PasteurizationUnits'):
+        return (0.0, float('inf'))
+    # Levels can read below zero when a gauge drifts (Ramp faults); leave them open
+    return (float('-inf'), float('inf'))
+
+
+class FeatureSchema:
+    """
+    Ordered feature list plus everything derived from it. Lookups by name
+    are compiled once into positions and masks so hot paths index NumPy
+    arrays directly instead of doing per-row string lookups.
+    """
+
+    def __init__(self, columns, dtypes=None, ranges=None):
+        self.columns = list(columns)
+        if len(set(self.columns)) != len(self.columns):
+            raise SchemaMismatchError("Feature schema contains duplicate columns")
+        unknown = sorted({module_of(c) for c in self.columns} - set(MODULES))
+        if unknown:
+            raise SchemaMismatchError(f"Feature schema has columns from unknown modules: {unknown}")
+
+        self.dtypes = dict(dtypes) if dtypes else {
+            c: 'bool' if is_binary(c) else 'float32' for c in self.columns
+        }
+        # Training ranges only raise warnings; sensor limits are what rejects a row
+        self.limits = {c: sensor_limits(c) for c in self.columns}
+        self.ranges = {c: tuple(r) for c, r in ranges.items()} if ranges else dict(self.limits)
+
+        # --- Precompiled lookups ---
+        self.index = {c: i for i, c in enumerate(self.columns)}
+        self.names = np.array(self.columns, dtype=object)
+        self.modules = {m: [c for c in self.columns if module_of(c) == m] for m in MODULES}
+        self.module_indices = {m: np.array([self.index[c] for c in cols], dtype=np.intp)
+                               for m, cols in self.modules.items()}
+        self.module_masks = {m: np.isin(np.arange(len(self.columns)), idx)
+                             for m, idx in self.module_indices.items()}
+        self.binary_mask = np.array([self.dtypes[c] == 'bool' for c in self.columns])
+        self.limit_lower = np.array([self.limits[c][0] for c in self.columns], dtype=np.float64)
+        self.limit_upper = np.array([self.limits[c][1] for c in self.columns], dtype=np.float64)
+        self.lower = np.array([self.ranges[c][0] for c in self.columns], dtype=np.float64)
+        self.upper = np.array([self.ranges[c][1] for c in self.columns], dtype=np.float64)
+        # Module-major order, used wherever results should follow the module grouping
+        self.module_order = np.concatenate([self.module_indices[m] for m in MODULES])
+
+    def __len__(self):
+        return len(self.columns)
+
+    @property
+    def fingerprint(self):
+        return hashlib.sha1('\n'.join(self.columns).encode('utf-8')).hexdigest()[:12]
+
+    def to_matrix(self, df, fill_value=np.nan):
+        """(rows x features) float32 array in schema order; absent columns get fill_value"""
+        X = np.full((len(df), len(self.columns)), fill_value, dtype=np.float32)
+        for name in df.columns:
+            j = self.index.get(name)
+            if j is not None:
+                values = df[name]
+                if values.dtype == object:
+                    # Strings/None from JSON become NaN and are caught by validation
+                    import pandas as pd
+                    values = pd.to_numeric(values, errors='coerce')
+                X[:, j] = np.asarray(values, dtype=np.float32)
+        return X
+
+    def present_mask(self, names):
+        """bool (features,) - which schema columns appear in `names`"""
+        names = set(names)
+        return np.array([c in names for c in self.columns], dtype=bool)
+
+    def fit_ranges(self, df, margin=0.1):
+        """New schema whose ranges are the observed min/max widened by `margin` of the span"""
+        ranges = {}
+        for c in self.columns:
+            if self.dtypes[c] == 'bool':
+                ranges[c] = (0.0, 1.0)
+                continue
+            low, high = float(df[c].min()), float(df[c].max())
+            # Constant columns still get some slack around their single value
+            pad = (high - low) * margin or max(abs(high), 1.0) * margin
+            ranges[c] = (low - pad, high + pad)
+        return FeatureSchema(self.columns, self.dtypes, ranges)
+
+    # --- Serialisation / model binding ---
+
+    def to_dict(self):
+        return {
+            "version": SCHEMA_VERSION,
+            "columns": self.columns,
+            "dtypes": self.dtypes,
+            "ranges": {c: list(r) for c, r in self.ranges.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != SCHEMA_VERSION:
+            raise SchemaMismatchError(f"Unsupported feature schema version: {data.get('version')}")
+        return cls(data["columns"], data.get("dtypes"), data.get("ranges"))
+
+    def attach(self, booster):
+        """Embed this schema into a Booster so it travels with the model file"""
+        booster.set_attr(**{SCHEMA_ATTR: json.dumps(self.to_dict())})
+        if booster.feature_names is None:
+            booster.feature_names = self.columns
+
+    @classmethod
+    def from_booster(cls, booster, fallback=None):
+        """Schema embedded in a Booster, or `fallback` for models trained before embedding"""
+        raw = booster.attr(SCHEMA_ATTR)
+        schema = cls.from_dict(json.loads(raw)) if raw else (fallback or DEFAULT_SCHEMA)
+        schema.check_booster(booster)
+        return schema
+
+    def check_booster(self, booster):
+        n_features = booster.num_features()
+        if n_features != len(self.columns):
+            raise SchemaMismatchError(
+                f"Model expects {n_features} features but the schema defines {len(self.columns)}")
+        names = booster.feature_names
+        if names is not None and list(names) != self.columns:
+            mismatched = next(i for i, (a, b) in enumerate(zip(names, self.columns)) if a != b)
+            raise SchemaMismatchError(
+                f"Model feature order differs from the schema at position {mismatched}: "
+                f"model has '{names[mismatched]}', schema has '{self.columns[mismatched]}'")
+
+
+DEFAULT_SCHEMA = FeatureSchema(FEATURE_COLUMNS)
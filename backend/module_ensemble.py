@@ -0,0 +1,124 @@
+# module_ensemble.py - One small model per plant module, scored in parallel
+#
+# Model/model.py trains a Booster per module (Mixer, Pasteurizer, ...) on that
+# module's columns only, labelled with the faults located in that module
+# (Normal otherwise), and saves them together with the feature schema. At
+# serving time every module scores its column slice on a shared thread pool;
+# XGBoost releases the GIL during predict, so the modules really run
+# concurrently. The merged verdict is taken from the module that looks most
+# anomalous (lowest Normal probability), and that module is reported as the
+# one that fired.
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+
+from feature_schema import MODULES, FeatureSchema
+
+NORMAL_CODE = 0
+
+
+class ModuleEnsemble:
+    """Per-module Boosters over schema column slices with a merged verdict"""
+
+    def __init__(self, boosters, schema, max_workers=None, parallel_min_rows=64):
+        missing = [m for m in schema.modules if schema.modules[m] and m not in boosters]
+        if missing:
+            raise ValueError(f"Module models missing for: {missing}")
+        self.schema = schema
+        self.boosters = {m: boosters[m] for m in MODULES if m in boosters}
+        self.modules = list(self.boosters)
+        # Thread dispatch costs more than it saves on a handful of rows
+        self.parallel_min_rows = parallel_min_rows
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(self.modules),
+                                            thread_name_prefix="module-scoring")
+
+    @classmethod
+    def from_file(cls, path, schema=None, **kwargs):
+        """Load module_models.pkl; refuses a bundle built for another schema"""
+        bundle = joblib.load(path)
+        bundle_schema = FeatureSchema.from_dict(bundle["schema"])
+        if schema is not None and bundle_schema.fingerprint != schema.fingerprint:
+            raise ValueError("Module models were trained on a different feature schema")
+        return cls(bundle["boosters"], schema or bundle_schema, **kwargs)
+
+    def save(self, path):
+        joblib.dump({"schema": self.schema.to_dict(), "boosters": self.boosters}, path)
+
+    def _predict_module(self, module, X):
+        import xgboost as xgb
+        dmatrix = xgb.DMatrix(X[:, self.schema.module_indices[module]],
+                              feature_names=self.schema.modules[module])
+        return self.boosters[module].predict(dmatrix)
+
+    def module_probabilities(self, X, parallel=None):
+        """(modules x rows x classes) probabilities, one slice per module"""
+        if parallel is None:
+            parallel = len(X) >= self.parallel_min_rows
+        if parallel:
+            futures = [self._executor.submit(self._predict_module, m, X) for m in self.modules]
+            return np.stack([f.result() for f in futures])
+        return np.stack([self._predict_module(m, X) for m in self.modules])
+
+    def score(self, X, parallel=None):
+        """
+        Returns (probabilities, predicted codes, fired module per row). The
+        module with the lowest Normal probability decides each row; rows
+        predicted Normal have no fired module (None).
+        """
+        per_module = self.module_probabilities(X, parallel)
+        fired = np.argmin(per_module[:, :, NORMAL_CODE], axis=0)
+        rows = np.arange(per_module.shape[1])
+        prediction_probs = per_module[fired, rows]
+        predictions = np.argmax(prediction_probs, axis=1)
+        modules = np.array(self.modules, dtype=object)[fired]
+        modules[predictions == NORMAL_CODE] = None
+        return prediction_probs, predictions, modules
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+# Benchmark: monolithic Booster vs per-module ensemble (sequential and threaded)
+if __name__ == "__main__":
+    import sys
+    import time
+
+    import xgboost as xgb
+
+    from data_generator import IceCreamDataGenerator
+
+    model_path = os.environ.get('MODEL_PATH', 'models/anomaly_detector.pkl')
+    modules_path = os.environ.get('MODULE_MODELS_PATH', 'models/module_models.pkl')
+    if not (os.path.exists(model_path) and os.path.exists(modules_path)):
+        sys.exit(f"Need both {model_path} and {modules_path} (see Model/model.py)")
+
+    monolithic = joblib.load(model_path)
+    schema = FeatureSchema.from_booster(monolithic)
+    ensemble = ModuleEnsemble.from_file(modules_path, schema)
+    generator = IceCreamDataGenerator()
+
+    print(f"{'rows':>7} | {'monolithic':>12} | {'modules seq':>12} | {'modules thr':>12} | agreement")
+    for batch_size in (1, 100, 10000):
+        X = schema.to_matrix(generator.generate_normal_data(batch_size))
+        repeats = max(5, 20000 // batch_size)
+
+        def best_of(fn):
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                result = fn()
+                timings.append(time.perf_counter() - started)
+            return min(timings), result
+
+        mono_time, mono_probs = best_of(
+            lambda: monolithic.predict(xgb.DMatrix(X, feature_names=schema.columns)))
+        seq_time, _ = best_of(lambda: ensemble.score(X, parallel=False))
+        thr_time, (_, predictions, _) = best_of(lambda: ensemble.score(X, parallel=True))
+        agreement = float(np.mean(predictions == np.argmax(mono_probs, axis=1)))
+        print(f"{batch_size:>7,} | {mono_time * 1000:>9.2f} ms | {seq_time * 1000:>9.2f} ms | "
+              f"{thr_time * 1000:>9.2f} ms | {agreement:.1%}")
+
+    ensemble.close()
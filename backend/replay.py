@@ -0,0 +1,356 @@
+# replay.py - Replay recorded runs through the live scoring pipeline
+#
+# Usage:
+#   python replay.py "../Labelled Data/*.csv" --max-concurrent 8
+#   python replay.py data/exported_data.csv --group-by-run --window 120 --json report.json
+#
+# Each run becomes a production line. Runs are read in chunks and advanced
+# together on a shared simulated clock, so several runs are interleaved in
+# timestamp order exactly as concurrent lines would be. Every window of rows
+# goes through app.predict_frame (validation -> scoring -> attribution) and an
+# EpisodeTracker in-process, without HTTP. The report covers per-class
+# precision/recall, detection delay per labelled anomaly episode and the
+# achieved speed-up over wall-clock time.
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import app
+from episode_tracker import EpisodeTracker
+
+
+def relative_seconds(timestamps, sample_period):
+    """
+    Timestamps as float seconds since the epoch, or None when they are not
+    usable and the caller falls back to the row number x sample_period.
+    Measured as a timedelta so the result does not depend on the datetime
+    unit pandas picks (ns before pandas 3, us by default since).
+    """
+    parsed = pd.to_datetime(pd.Series(timestamps), errors='coerce')
+    if parsed.notna().all():
+        if parsed.dt.tz is not None:
+            parsed = parsed.dt.tz_convert(None)
+        return (parsed - pd.Timestamp(0)).dt.total_seconds().to_numpy()
+    numeric = pd.to_numeric(timestamps, errors='coerce')
+    if numeric.notna().all():
+        return numeric.to_numpy(dtype=np.float64)
+    return None
+
+
+def truth_labels(rows):
+    """
+    Ground-truth class per row, following DataProcessing/Preprocessing.ipynb:
+    a row is anomalous only when Anomaly != 0 and 'Parameter for Anomaly'
+    names the faulty parameter. Anomalous rows without one carry no usable
+    label and come back as None; None for every row without an Anomaly column.
+    """
+    if 'Anomaly' not in rows:
+        return [None] * len(rows)
+    codes = rows['Anomaly'].fillna(0).to_numpy(dtype=np.int64)
+    if 'Parameter for Anomaly' in rows:
+        parameter = rows['Parameter for Anomaly'].fillna('').astype(str).str.strip()
+        attributed = ((parameter != '') & (parameter != 'No Anomaly')).to_numpy()
+    else:
+        attributed = np.zeros(len(rows), dtype=bool)
+    return [int(code) if code == 0 or known else None for code, known in zip(codes, attributed)]
+
+
+class RunReader:
+    """Chunked reader for one run, handing out rows up to a simulated time"""
+
+    def __init__(self, line_id, chunks, offset, sample_period):
+        self.line_id = line_id
+        self.chunks = chunks
+        self.offset = offset
+        self.sample_period = sample_period
+        self.buffer = None
+        self.t0 = None
+        self.rows_read = 0
+        self.exhausted = False
+
+    def _next_chunk(self):
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self.exhausted = True
+            return None
+        chunk = chunk.reset_index(drop=True)
+        t = relative_seconds(chunk['Timestamp'], self.sample_period) if 'Timestamp' in chunk else None
+        if t is None:
+            t = (self.rows_read + np.arange(len(chunk))) * self.sample_period
+        if self.t0 is None:
+            self.t0 = t[0] if len(t) else 0.0
+        chunk['_t'] = t - self.t0 + self.offset
+        self.rows_read += len(chunk)
+        return chunk
+
+    def take_until(self, t_end):
+        """Rows with simulated time < t_end; reads further chunks only as needed"""
+        parts = []
+        while True:
+            if self.buffer is None or len(self.buffer) == 0:
+                self.buffer = self._next_chunk()
+                if self.buffer is None:
+                    break
+            cut = int(np.searchsorted(self.buffer['_t'].to_numpy(), t_end, side='left'))
+            parts.append(self.buffer.iloc[:cut])
+            self.buffer = self.buffer.iloc[cut:]
+            if len(self.buffer):
+                break
+        parts = [p for p in parts if len(p)]
+        return pd.concat(parts, ignore_index=True) if parts else None
+
+    @property
+    def done(self):
+        return self.exhausted and (self.buffer is None or len(self.buffer) == 0)
+
+
+# Combined file Labelling/Label.py writes next to the per-run files
+MASTER_FILE = 'Master_Labeled.csv'
+
+
+def file_runs(paths, chunk_size):
+    """One run per file (e.g. Labelled Data/Step_12.csv); the combined master file is skipped"""
+    for path in paths:
+        if os.path.basename(path) == MASTER_FILE:
+            print(f"Skipping {path}: it repeats the individual run files", file=sys.stderr)
+            continue
+        line_id = os.path.splitext(os.path.basename(path))[0]
+        yield line_id, (lambda p=path: iter(pd.read_csv(p, chunksize=chunk_size)))
+
+
+def index_runs(path):
+    """
+    One pass over the raw lines of a 'Run id'-grouped export: returns the
+    header columns and (run_id, byte offset, rows) for every run. Only the
+    run boundaries are kept, so memory grows with the number of runs.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        columns = next(csv.reader([header.decode('utf-8-sig')]))
+        if 'Run id' not in columns:
+            raise SystemExit(f"{path} has no 'Run id' column")
+        position = columns.index('Run id')
+        offset = len(header)
+        runs, seen, current = [], set(), None
+        for line in f:
+            if line.strip():
+                run_id = line.split(b',', position + 1)[position].strip().strip(b'"').decode('utf-8')
+                if run_id != current:
+                    if run_id in seen:
+                        raise SystemExit(f"Run {run_id} is not contiguous in {path}; sort the file by 'Run id'")
+                    seen.add(run_id)
+                    runs.append([run_id, offset, 0])
+                    current = run_id
+                runs[-1][2] += 1
+            offset += len(line)
+    return columns, runs
+
+
+def run_chunks(path, columns, offset, rows, chunk_size):
+    """Chunks of one run, read from its byte offset without touching earlier rows"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        yield from pd.read_csv(f, header=None, names=columns, nrows=rows, chunksize=chunk_size)
+
+
+def grouped_runs(path, chunk_size):
+    """
+    Runs inside one export grouped by 'Run id'. index_runs() finds each run's
+    byte offset once; each run then gets its own chunked reader starting there.
+    """
+    columns, runs = index_runs(path)
+    for run_id, offset, rows in runs:
+        yield f"run-{run_id}", (lambda o=offset, n=rows: run_chunks(path, columns, o, n, chunk_size))
+
+
+class ReplayMetrics:
+    """Confusion counts plus ground-truth episode detection delays"""
+
+    def __init__(self, n_classes):
+        self.confusion = np.zeros((n_classes, n_classes), dtype=np.int64)
+        self.rejected = 0
+        self.rows = 0
+        self.delays = []
+        self.missed = 0
+        self._truth = {}         # line_id -> [start_t, detected]
+        self._alerting = set()   # lines with an open tracker episode
+
+    def observe(self, line_id, t, label, prediction, event):
+        if event is not None:
+            if event['event'] == 'opened':
+                self._alerting.add(line_id)
+            else:
+                self._alerting.discard(line_id)
+
+        # Unlabelled rows (None) neither start nor end a ground-truth episode
+        truth = self._truth.get(line_id)
+        if label and truth is None:
+            truth = self._truth[line_id] = [t, False]
+        elif label == 0 and truth is not None:
+            self.end_episode(line_id)
+            truth = None
+        if truth is not None and not truth[1] and line_id in self._alerting:
+            truth[1] = True
+            self.delays.append(t - truth[0])
+
+        if prediction is not None and label is not None:
+            self.confusion[int(label), prediction['anomaly_code']] += 1
+
+    def end_episode(self, line_id):
+        truth = self._truth.pop(line_id, None)
+        if truth is not None and not truth[1]:
+            self.missed += 1
+
+    def end_line(self, line_id):
+        self.end_episode(line_id)
+        self._alerting.discard(line_id)
+
+    def report(self):
+        per_class = {}
+        for code, name in app.anomaly_mapping.items():
+            tp = self.confusion[code, code]
+            predicted = self.confusion[:, code].sum()
+            support = self.confusion[code, :].sum()
+            per_class[name] = {
+                "precision": float(tp / predicted) if predicted else None,
+                "recall": float(tp / support) if support else None,
+                "support": int(support),
+            }
+        delays = np.array(self.delays)
+        return {
+            "per_class": per_class,
+            "episodes": {
+                "labelled": len(self.delays) + self.missed,
+                "detected": len(self.delays),
+                "missed": self.missed,
+                "delay_seconds": {
+                    "mean": float(delays.mean()) if len(delays) else None,
+                    "median": float(np.median(delays)) if len(delays) else None,
+                    "p95": float(np.percentile(delays, 95)) if len(delays) else None,
+                },
+            },
+        }
+
+
+def replay(runs, window, max_concurrent, sample_period, tracker):
+    metrics = ReplayMetrics(len(app.anomaly_mapping))
+    pending = iter(runs)
+    active = []
+    sim_time = 0.0
+    started = time.perf_counter()
+
+    while True:
+        # Start new runs (as new lines) whenever a slot is free
+        while len(active) < max_concurrent:
+            run = next(pending, None)
+            if run is None:
+                break
+            line_id, open_chunks = run
+            active.append(RunReader(line_id, open_chunks(), sim_time, sample_period))
+        if not active:
+            break
+
+        window_end = sim_time + window
+        for reader in active:
+            rows = reader.take_until(window_end)
+            if rows is None:
+                continue
+            results, rejected = app.predict_frame(rows, reader.line_id)
+            metrics.rows += len(rows)
+            metrics.rejected += len(rejected)
+
+            by_row = {r['row_id']: r for r in results}
+            times = rows['_t'].to_numpy()
+            labels = truth_labels(rows)
+            for i in range(len(rows)):
+                prediction = by_row.get(i)
+                event = None
+                if prediction is not None:
+                    event = tracker.update(reader.line_id, {**prediction, "timestamp": float(times[i])})
+                metrics.observe(reader.line_id, float(times[i]), labels[i], prediction, event)
+
+        for reader in [r for r in active if r.done]:
+            metrics.end_line(reader.line_id)
+            active.remove(reader)
+        sim_time = window_end
+
+    wall_seconds = time.perf_counter() - started
+    report = metrics.report()
+    report["replay"] = {
+        "rows": metrics.rows,
+        "rejected_rows": metrics.rejected,
+        "simulated_seconds": sim_time,
+        "wall_seconds": wall_seconds,
+        "speedup": sim_time / wall_seconds if wall_seconds else None,
+        "rows_per_second": metrics.rows / wall_seconds if wall_seconds else None,
+    }
+    return report
+
+
+def print_report(report):
+    print("\nPer-class metrics:")
+    for name, m in report["per_class"].items():
+        precision = f"{m['precision']:.4f}" if m['precision'] is not None else "   n/a"
+        recall = f"{m['recall']:.4f}" if m['recall'] is not None else "   n/a"
+        print(f"  {name:<8} precision {precision}  recall {recall}  support {m['support']:,}")
+
+    episodes = report["episodes"]
+    delay = episodes["delay_seconds"]
+    print(f"\nEpisodes: {episodes['detected']}/{episodes['labelled']} detected, {episodes['missed']} missed")
+    if delay["mean"] is not None:
+        print(f"  Detection delay: mean {delay['mean']:.1f}s | median {delay['median']:.1f}s | "
+              f"p95 {delay['p95']:.1f}s")
+
+    r = report["replay"]
+    print(f"\nReplayed {r['rows']:,} rows ({r['rejected_rows']:,} rejected by validation)")
+    print(f"  {r['simulated_seconds']:.0f}s of plant time in {r['wall_seconds']:.1f}s wall time "
+          f"-> {r['speedup'] or 0:,.0f}x real time ({r['rows_per_second'] or 0:,.0f} rows/sec)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded runs through the live anomaly pipeline")
+    parser.add_argument('inputs', nargs='+', help="Run CSV files or glob patterns")
+    parser.add_argument('--group-by-run', action='store_true',
+                        help="Inputs are exports with many runs, grouped by 'Run id'")
+    parser.add_argument('--model', default=None, help="Model path (defaults to MODEL_PATH or models/)")
+    parser.add_argument('--max-concurrent', type=int, default=8, help="Runs replayed at once as lines")
+    parser.add_argument('--window', type=float, default=60.0, help="Simulated seconds scored per step")
+    parser.add_argument('--chunk-size', type=int, default=50000, help="Rows read per chunk per run")
+    parser.add_argument('--sample-period', type=float, default=1.0,
+                        help="Seconds between rows when there is no usable Timestamp column")
+    parser.add_argument('--json', help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    if not app.load_model(args.model):
+        return 1
+
+    paths = sorted({p for pattern in args.inputs for p in glob.glob(pattern)})
+    if not paths:
+        print("No input files found", file=sys.stderr)
+        return 1
+    if args.group_by_run:
+        runs = (run for path in paths for run in grouped_runs(path, args.chunk_size))
+    else:
+        runs = file_runs(paths, args.chunk_size)
+
+    tracker = EpisodeTracker(max_feed=1)
+    report = replay(runs, args.window, args.max_concurrent, args.sample_period, tracker)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
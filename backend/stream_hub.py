@@ -0,0 +1,157 @@
+# stream_hub.py - Server-push fan-out of live anomaly predictions
+
+import json
+import queue
+import threading
+import time
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """
+    A single connected dashboard. Each subscriber owns a bounded queue so a
+    slow client can never make the scoring loop (or other clients) wait.
+    """
+
+    def __init__(self, lines=None, max_queue=100):
+        self.lines = set(lines) if lines else None  # None = all lines
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.closed = False
+
+    def wants(self, line_id):
+        return self.lines is None or line_id in self.lines
+
+    def offer(self, event):
+        """Enqueue without blocking; on overflow drop the oldest event"""
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+
+class PredictionStreamHub:
+    """
+    Runs one scoring loop for all production lines and fans the results
+    out to every subscriber. Only state changes and anomalous predictions
+    are pushed; repeated "Normal" results are suppressed.
+    """
+
+    def __init__(self, score_fn, sample_fn, lines=('line-1',), interval=2.0,
+                 max_queue=100, heartbeat=15.0, always_on=False):
+        self.score_fn = score_fn      # list of samples -> list of prediction dicts (None = rejected)
+        self.sample_fn = sample_fn    # line_id -> sensor sample dict
+        self.lines = list(lines)
+        self.interval = interval
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self.last_state = {}
+        self.listeners = []           # in-process callbacks(line_id, sample, prediction)
+        self.always_on = always_on    # keep scoring (for listeners) with no dashboard connected
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    # --- Subscription management -------------------------------------
+
+    def subscribe(self, lines=None):
+        subscriber = Subscriber(lines, self.max_queue)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        # Send the current state so a new dashboard does not start blank
+        for line_id, state in list(self.last_state.items()):
+            if subscriber.wants(line_id):
+                subscriber.offer(("state", state))
+        self.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscriber.closed = True
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event_type, payload):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if subscriber.wants(payload.get("line_id")):
+                subscriber.offer((event_type, payload))
+
+    # --- Scoring loop ---------------------------------------------------
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stream-scoring", daemon=True)
+        self._thread.start()
+        logger.info("Live scoring loop started for lines: %s", ", ".join(self.lines))
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            if self.always_on or self.subscriber_count():
+                try:
+                    self.tick()
+                except Exception as e:
+                    logger.error(f"Live scoring error: {str(e)}")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def tick(self):
+        """Score one sample per line in a single batch and publish what changed"""
+        samples = [self.sample_fn(line_id) for line_id in self.lines]
+        predictions = self.score_fn(samples)
+
+        for line_id, sample, prediction in zip(self.lines, samples, predictions):
+            if prediction is None:
+                continue  # rejected by input validation
+            for listener in self.listeners:
+                listener(line_id, sample, prediction)
+
+            previous = self.last_state.get(line_id)
+            state_changed = previous is None or previous["anomaly_type"] != prediction["anomaly_type"]
+            state = {"line_id": line_id, **prediction}
+            self.last_state[line_id] = state
+
+            if state_changed:
+                self.publish("state", state)
+            if prediction["anomaly_type"] != "Normal":
+                self.publish("prediction", {**state, "sensor_data": sample})
+
+    # --- SSE encoding -----------------------------------------------------
+
+    def event_stream(self, subscriber):
+        """Generator yielding Server-Sent Events for one subscriber"""
+        try:
+            yield "retry: 3000\n\n"
+            while not subscriber.closed:
+                try:
+                    event_type, payload = subscriber.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield f": keepalive {datetime.now().isoformat()}\n\n"
+                    continue
+                if subscriber.dropped:
+                    payload = {**payload, "dropped_events": subscriber.dropped}
+                    subscriber.dropped = 0
+                yield f"event: {event_type}\ndata: {json.dumps(payload, default=str)}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
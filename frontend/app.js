@@ -615,9 +615,89 @@ function exportData() {
   window.URL.revokeObjectURL(url);
 }
 
-// Real-time simulation
+// Real-time updates: pushed from the backend stream, local simulation as fallback
+const STREAM_URL = 'http://localhost:5000/stream';
+let simulationTimer = null;
+
 function startRealTimeSimulation() {
-  setInterval(updateRealTimeData, 2000); // Update every 2 seconds
+  if (typeof EventSource === 'undefined') {
+    startLocalSimulation();
+    return;
+  }
+
+  const stream = new EventSource(STREAM_URL);
+  let connected = false;
+
+  stream.onopen = () => {
+    connected = true;
+    stopLocalSimulation();
+  };
+
+  stream.onerror = () => {
+    // Backend unreachable before the first connect: keep the demo alive locally
+    if (!connected) {
+      stream.close();
+      startLocalSimulation();
+    }
+  };
+
+  stream.addEventListener('state', (event) => applyStreamEvent(JSON.parse(event.data)));
+  stream.addEventListener('prediction', (event) => applyStreamEvent(JSON.parse(event.data)));
+}
+
+function startLocalSimulation() {
+  if (!simulationTimer) {
+    simulationTimer = setInterval(updateRealTimeData, 2000); // Update every 2 seconds
+  }
+}
+
+function stopLocalSimulation() {
+  if (simulationTimer) {
+    clearInterval(simulationTimer);
+    simulationTimer = null;
+  }
+}
+
+function applyStreamEvent(prediction) {
+  const isAnomaly = prediction.anomaly_type !== 'Normal';
+  const affectedModule = isAnomaly && prediction.parameter_for_anomaly
+    ? prediction.parameter_for_anomaly.split('/')[0]
+    : null;
+
+  appData.modules.forEach(module => {
+    if (module.name === affectedModule) {
+      module.status = 'anomaly';
+    } else if (!isAnomaly && module.status === 'anomaly') {
+      module.status = 'normal';
+    }
+  });
+
+  const sensorData = prediction.sensor_data;
+  if (sensorData) {
+    appData.modules.forEach(module => {
+      if (sensorData[`${module.name}/Temperature`] !== undefined) {
+        module.temperature = sensorData[`${module.name}/Temperature`];
+      }
+      if (sensorData[`${module.name}/Level`] !== undefined) {
+        module.level = sensorData[`${module.name}/Level`];
+      }
+    });
+  }
+
+  if (isAnomaly && affectedModule) {
+    appData.recentAnomalies.unshift({
+      timestamp: new Date(prediction.timestamp).toLocaleString(),
+      type: prediction.anomaly_type,
+      module: affectedModule,
+      parameter: prediction.parameter_for_anomaly.split('/').slice(1).join('/'),
+      severity: prediction.confidence > 0.9 ? 'High' : prediction.confidence > 0.7 ? 'Medium' : 'Low'
+    });
+    appData.recentAnomalies = appData.recentAnomalies.slice(0, 50);
+    renderAnomalies();
+  }
+
+  renderModuleCards();
+  updateSystemStatus();
 }
 
 function updateRealTimeData() {
@@ -56,6 +56,12 @@ class AnomalyDetectionAPI {
     async getModelInfo() {
         return await this.makeRequest('/model_info');
     }
+
+    // Subscribe to the server-push prediction stream (Server-Sent Events)
+    openStream(lines = null) {
+        const query = lines && lines.length ? `?lines=${encodeURIComponent(lines.join(','))}` : '';
+        return new EventSource(`${this.baseURL}/stream${query}`);
+    }
 }
 
 // Dashboard Manager - Main application controller
@@ -65,8 +71,10 @@ class DashboardManager {
         this.isRunning = false;
         this.currentData = null;
         this.anomalyHistory = [];
-        this.updateInterval = 5000; // 5 seconds
+        this.updateInterval = 5000; // 5 seconds (polling fallback only)
         this.charts = {};
+        this.stream = null;
+        this.streamLines = null; // null = all lines
         
         this.init();
     }
@@ -187,15 +195,62 @@ class DashboardManager {
         this.isRunning = true;
         this.updateSystemStatus('active');
         
-        // Start the monitoring loop
-        this.monitoringLoop();
+        // Prefer the server-push stream; fall back to polling without EventSource
+        if (typeof EventSource !== 'undefined') {
+            this.startStream();
+        } else {
+            this.monitoringLoop();
+        }
     }
 
     stopMonitoring() {
         this.isRunning = false;
+        if (this.stream) {
+            this.stream.close();
+            this.stream = null;
+        }
         this.updateSystemStatus('stopped');
     }
 
+    startStream() {
+        this.stream = this.api.openStream(this.streamLines);
+
+        // Sent when a line changes class (including the initial state on connect)
+        this.stream.addEventListener('state', (event) => {
+            const state = JSON.parse(event.data);
+            if (state.dropped_events) {
+                console.warn(`Stream dropped ${state.dropped_events} events for a slow client`);
+            }
+            this.updateModulesStatus(this.currentData || {}, { predictions: [state] });
+        });
+
+        // Sent for every anomalous prediction, with the sensor reading that triggered it
+        this.stream.addEventListener('prediction', (event) => {
+            const prediction = JSON.parse(event.data);
+            const { sensor_data: sensorData, ...pred } = prediction;
+            this.updateDashboard(sensorData, { predictions: [pred] }, { notify: false });
+        });
+
+        // Sent when an anomaly episode opens or closes; notify once per episode
+        this.stream.addEventListener('episode', (event) => {
+            const episode = JSON.parse(event.data);
+            if (episode.event === 'opened') {
+                this.showAnomalyNotification({
+                    anomaly_type: episode.dominant_class,
+                    parameter_for_anomaly: episode.dominant_parameter,
+                    confidence: episode.peak_confidence
+                });
+            }
+        });
+
+        this.stream.onopen = () => this.updateSystemStatus('active');
+
+        // EventSource reconnects on its own; just reflect the outage in the UI
+        this.stream.onerror = () => {
+            if (this.isRunning) this.updateSystemStatus('warning');
+        };
+    }
+
     async monitoringLoop() {
         while (this.isRunning) {
             try {
@@ -220,7 +275,7 @@ class DashboardManager {
         }
     }
 
-    updateDashboard(sensorData, prediction) {
+    updateDashboard(sensorData, prediction, { notify = true } = {}) {
         // Update current data
         this.currentData = sensorData;
         
@@ -234,7 +289,7 @@ class DashboardManager {
         if (prediction.predictions && prediction.predictions.length > 0) {
             const pred = prediction.predictions[0];
             if (pred.anomaly_type !== 'Normal') {
-                this.handleAnomaly(pred);
+                this.handleAnomaly(pred, notify);
             }
         }
     }
@@ -308,7 +363,7 @@ class DashboardManager {
         }
     }
 
-    handleAnomaly(prediction) {
+    handleAnomaly(prediction, notify = true) {
         // Add to anomaly history
         this.anomalyHistory.unshift({
             timestamp: new Date().toISOString(),
@@ -320,8 +375,10 @@ class DashboardManager {
             this.anomalyHistory = this.anomalyHistory.slice(0, 50);
         }
         
-        // Show notification
-        this.showAnomalyNotification(prediction);
+        // Show notification (streamed rows notify per episode instead)
+        if (notify) {
+            this.showAnomalyNotification(prediction);
+        }
         
         // Update anomaly log table
         this.updateAnomalyLog();